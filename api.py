@@ -0,0 +1,194 @@
+# BloodReady | Eligibility API
+# Stateless JSON endpoints for kiosks and the SMS bot, running the same
+# compiled rule table as the Streamlit form without a browser session.
+#
+#   uvicorn api:app --workers 4 --port 8000
+#   python api.py                      # same, workers from BLOODREADY_API_WORKERS
+
+import os
+from datetime import date
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from eligibility import _no, _true, get_rules
+from malaria_index import get_index
+from metrics import CONTENT_TYPE, REGISTRY, span
+
+MAX_BATCH = 10_000
+# Batches this large are evaluated off the event loop
+THREADPOOL_BATCH = 500
+
+NUMERIC_FIELDS = ("age", "weight", "hb")
+ANSWER_FIELDS = ("well", "meds", "tattoo", "gender", "menstruating", "pregnancy")
+DATE_FIELDS = ("donation_date", "tattoo_date", "travel_date", "birth_date")
+
+
+class InvalidRequest(ValueError):
+    pass
+
+
+# --- Request Parsing ---
+def _answer(value):
+    # Kiosks send JSON booleans; the engine works on the i18n answer codes
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return None if value is None else str(value)
+
+
+def _flag(field, value):
+    # Only the values the rule table reads as true or false; "false" is not truthy
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if _true(value):
+            return True
+        if value in ("False", "false", "0") or _no(value):
+            return False
+    raise InvalidRequest(f"{field}: expected true or false, got {value!r}")
+
+
+def _date(field, value):
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise InvalidRequest(f"{field}: expected an ISO date, got {value!r}")
+
+
+def _number(field, value, required=False):
+    if value is None:
+        if required:
+            raise InvalidRequest(f"{field} is required")
+        return np.nan
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidRequest(f"{field}: expected a number, got {value!r}")
+    return float(value)
+
+
+def _row(item):
+    if not isinstance(item, dict):
+        raise InvalidRequest("each check must be a JSON object")
+    row = {f: _number(f, item.get(f), required=f != "hb") for f in NUMERIC_FIELDS}
+    row.update({f: _answer(item.get(f)) for f in ANSWER_FIELDS})
+    row.update({f: _date(f, item.get(f)) for f in DATE_FIELDS})
+    if item.get("malaria_risk") is not None:
+        row["malaria_risk"] = _flag("malaria_risk", item["malaria_risk"])
+    else:
+        row["malaria_risk"] = get_index().match(str(item.get("country") or ""), str(item.get("region") or "")) is not None
+    return row
+
+
+def _columns(rows):
+    return {field: [row[field] for row in rows] for field in rows[0]}
+
+
+# --- Evaluation ---
+def evaluate(items, today=None, locale="en"):
+    """Run the rule table over a list of request objects; one result dict each."""
+    with span("api_evaluate"):
+        return _evaluate(items, today or date.today(), locale)
+
+
+def _evaluate(items, today, locale):
+    rules = get_rules()
+    data = _columns([_row(item) for item in items])
+    eligible, masks = rules.evaluate(data, today=today)
+    # Dates as strings once per column; "NaT" marks no fixed end
+    expiry = rules.expiry_dates(data, masks, today)
+    ends = {bit: np.datetime_as_string(d).tolist() for bit, d in expiry.items()}
+    next_dates = np.datetime_as_string(rules.next_eligible(data, masks, today, expiry)).tolist()
+    # Rows share a handful of distinct masks; resolve each one's rules once
+    active = {}
+    results = []
+    for i, (ok, mask) in enumerate(zip(eligible.tolist(), masks.tolist())):
+        matched = active.get(mask)
+        if matched is None:
+            matched = active[mask] = [
+                (rule.bit, rule.id, rule.text.get(locale, rule.text["en"]), rule.blocking)
+                for rule in rules.rules if mask & rule.bit
+            ]
+        reasons = []
+        for bit, code, text, blocking in matched:
+            until = ends[bit][i] if bit in ends else "NaT"
+            reasons.append({"code": code, "text": text, "blocking": blocking, "until": None if until == "NaT" else until})
+        results.append({
+            "eligible": ok,
+            "reasons": reasons,
+            "next_eligible_date": None if next_dates[i] == "NaT" else next_dates[i],
+        })
+    return results
+
+
+# --- Endpoints ---
+async def _json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise InvalidRequest("body must be valid JSON")
+
+
+def _error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def check_one(request):
+    try:
+        body = await _json(request)
+        result = evaluate([body], locale=request.query_params.get("locale", "en"))[0]
+    except InvalidRequest as e:
+        return _error(str(e))
+    return JSONResponse({**result, "rules_version": get_rules().version})
+
+
+async def check_batch(request):
+    try:
+        body = await _json(request)
+        items = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            raise InvalidRequest("expected a non-empty array of checks (or {\"items\": [...]})")
+        if len(items) > MAX_BATCH:
+            return _error(f"at most {MAX_BATCH} checks per batch", status=413)
+        locale = request.query_params.get("locale", "en")
+        if len(items) >= THREADPOOL_BATCH:
+            results = await run_in_threadpool(evaluate, items, None, locale)
+        else:
+            results = evaluate(items, locale=locale)
+    except InvalidRequest as e:
+        return _error(str(e))
+    return JSONResponse({"results": results, "rules_version": get_rules().version})
+
+
+async def prometheus(request):
+    # Per worker process; scrape each worker or run with a single worker
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "rules_version": get_rules().version})
+
+
+app = Starlette(routes=[
+    Route("/v1/eligibility", check_one, methods=["POST"]),
+    Route("/v1/eligibility/batch", check_batch, methods=["POST"]),
+    Route("/healthz", health, methods=["GET"]),
+    Route("/metrics", prometheus, methods=["GET"]),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api:app",
+        host=os.environ.get("BLOODREADY_API_HOST", "0.0.0.0"),
+        port=int(os.environ.get("BLOODREADY_API_PORT", "8000")),
+        workers=int(os.environ.get("BLOODREADY_API_WORKERS", str(os.cpu_count() or 1))),
+        access_log=False,
+    )
@@ -12,6 +12,8 @@ import smtplib
 from email.message import EmailMessage
 import pandas as pd
 import os
+import json
+import html
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -48,13 +50,42 @@ def send_email(to_email, subject, body, pdf_buffer):
         smtp.login('your_email@example.com', 'your_password')
         smtp.send_message(msg)
 
+# --- Photos ---
+# Served as resized, fingerprinted files from static/ (server.enableStaticServing)
+# once `python static_assets.py fetch` has built them and static/ sits next to
+# this app; until then the hosted originals are linked
+REMOTE_IMAGES = {
+    "images/sidebar.png": "https://blood-health-chatbot.streamlit.app/files/file-SnFRkJPAD4wgV45VizmH6z",
+    "images/event-1.png": "https://blood-health-chatbot.streamlit.app/files/file-FzUtSQno4mRzY3VTvPSah6",
+    "images/event-2.png": "https://blood-health-chatbot.streamlit.app/files/file-DwgfFk9VY7Azh1Aqcdahev",
+    "images/event-3.png": "https://blood-health-chatbot.streamlit.app/files/file-Y2SssVJR6RnF1bPMRv6BMZ",
+}
+
+@st.cache_resource
+def load_manifest():
+    try:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def photo(name, alt=""):
+    entry = load_manifest().get(name)
+    alt = html.escape(alt, quote=True)
+    if entry is None:
+        return f"<img src='{REMOTE_IMAGES[name]}' alt='{alt}'>"
+    return (
+        f"<img src='app/static/{entry['file']}' width='{entry['width']}' height='{entry['height']}' "
+        f"alt='{alt}' loading='lazy' decoding='async'>"
+    )
+
 # --- Language Pref ---
 language = st.sidebar.radio("🌐 Language / 언어", ["English", "한국어"])
 is_kr = language == "한국어"
 
 # --- Sidebar Info ---
 with st.sidebar:
-    st.image("https://blood-health-chatbot.streamlit.app/files/file-SnFRkJPAD4wgV45VizmH6z", use_column_width=True)
+    st.markdown(f"<div class='sidebar-photo'>{photo('images/sidebar.png', 'BloodReady')}</div>", unsafe_allow_html=True)
     st.markdown("## 🧾 Info")
     if is_kr:
         st.markdown("이 도구는 헌혈 자격 조건을 사전에 확인할 수 있도록 제작되었습니다.")
@@ -85,8 +116,13 @@ html, body, [class*='css'] {
     gap: 1.2rem;
     margin-top: 3rem;
 }
+.sidebar-photo img {
+    width: 100%;
+    height: auto;
+}
 .photo-grid img {
     width: 100%;
+    height: auto;
     border-radius: 12px;
     box-shadow: 0 3px 12px rgba(0,0,0,0.08);
     border: 1px solid #eee;
@@ -187,11 +223,8 @@ if st.button("결과 확인" if is_kr else "Check Eligibility"):
 # --- Gallery ---
 st.markdown("<div class='section'>", unsafe_allow_html=True)
 st.subheader("📸 행사 스냅 | Snapshots")
-st.markdown(\"""<div class='photo-grid'>
-<img src='https://blood-health-chatbot.streamlit.app/files/file-FzUtSQno4mRzY3VTvPSah6'>
-<img src='https://blood-health-chatbot.streamlit.app/files/file-DwgfFk9VY7Azh1Aqcdahev'>
-<img src='https://blood-health-chatbot.streamlit.app/files/file-Y2SssVJR6RnF1bPMRv6BMZ'>
-</div>\""", unsafe_allow_html=True)
+photos = "".join(photo(f"images/event-{i}.png", "BloodReady event") for i in (1, 2, 3))
+st.markdown(f"<div class='photo-grid'>{photos}</div>", unsafe_allow_html=True)
 st.markdown("</div>", unsafe_allow_html=True)
 
 # --- Dashboard ---
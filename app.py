@@ -1,5 +1,8 @@
 
 import streamlit as st
+import re
+import secrets
+import uuid
 from datetime import datetime, timedelta
 
 # -------------------------------
@@ -61,28 +64,80 @@ with st.form("eligibility_form"):
 # 2. Iron Tracker via Diet
 # -------------------------------
 st.header("2. Daily Iron Intake Tracker")
-st.write("Select the iron-rich foods you ate today:")
-
-iron_sources = {
-    "Spinach (1 cup)": 6.4,
-    "Beef (100g)": 2.6,
-    "Chicken liver (100g)": 9.0,
-    "Tofu (1/2 block)": 3.4,
-    "Lentils (1 cup)": 6.6,
-    "Dark chocolate (30g)": 3.3,
-    "Pumpkin seeds (30g)": 2.5,
-    "Broccoli (1 cup)": 1.0,
-    "Fortified cereal (1 bowl)": 8.0,
-    "Egg (1)": 0.9
-}
-
-selected_foods = st.multiselect("Iron-rich foods consumed:", options=list(iron_sources.keys()))
-
-if st.button("Calculate Iron Intake"):
-    total_iron = sum([iron_sources[food] for food in selected_foods])
+
+# Food table and search index are built once per process; the log is shared by every session
+@st.cache_resource
+def get_food_index():
+    from iron_foods import get_foods
+    return get_foods()
+
+@st.cache_resource
+def get_iron_log():
+    from iron_log import IronLog
+    log = IronLog()
+    log.start_sweeper()
+    return log
+
+# A kept log is keyed by a random token held in the URL, so a bookmark brings
+# it back and nobody can land on someone else's log by picking the same name
+if "iron_token" not in st.session_state:
+    token = st.query_params.get("log", "")
+    st.session_state["iron_token"] = token if re.fullmatch(r"[A-Za-z0-9_-]{22}", token) else ""
+keep = st.toggle(
+    "Keep my food log between visits (bookmark this page to come back to it)",
+    value=bool(st.session_state["iron_token"]), key="iron_keep",
+)
+if keep:
+    if not st.session_state["iron_token"]:
+        st.session_state["iron_token"] = secrets.token_urlsafe(16)
+    st.query_params["log"] = st.session_state["iron_token"]
+    user = f"log-{st.session_state['iron_token']}"
+else:
+    st.query_params.pop("log", None)
+    # Otherwise the log lasts for this browser session only (guest logs are
+    # purged after a day): a random key per session, since st.session_state
+    # itself is one proxy for every session
+    if "iron_guest" not in st.session_state:
+        st.session_state["iron_guest"] = f"guest-{uuid.uuid4().hex}"
+    user = st.session_state["iron_guest"]
+
+# Searching, adding and removing rerun only this section
+@st.fragment
+def iron_tracker(user):
+    foods = get_food_index()
+    log = get_iron_log()
+    today = datetime.today().date()
+
+    query = st.text_input("Search foods (e.g. spinach, liver, 시금치):", key="iron_query")
+    matches = foods.search(query) if query.strip() else foods.richest()
+    col1, col2, col3 = st.columns([4, 1, 1], vertical_alignment="bottom")
+    food = col1.selectbox(
+        f"Food ({len(foods)} in database):", matches, index=0 if matches else None,
+        format_func=foods.label, placeholder="No matching foods",
+    )
+    portions = col2.number_input("Portions", min_value=0.25, max_value=20.0, value=1.0, step=0.25)
+    if col3.button("Add", disabled=food is None):
+        log.add(user, today, food, portions)
+
+    entries = log.entries(user, today)
+    if entries:
+        st.write("**Logged today:**")
+        for entry_id, name, portion, count, iron, heme in entries:
+            c1, c2 = st.columns([6, 1])
+            c1.write(f"- {count:g} × {name} ({portion}): **{iron:.1f} mg** iron, {heme:.1f} mg heme")
+            c2.button("Remove", key=f"iron_remove_{entry_id}", on_click=log.remove, args=(user, entry_id))
+
+    summary = log.summary(user, today)
+    total_iron, heme_iron = summary["today"]
+    week_iron, _ = summary["window"]
     st.subheader("🧪 Iron Intake Result")
-    st.write(f"You consumed approximately **{total_iron:.1f} mg** of iron today.")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Today", f"{total_iron:.1f} mg")
+    m2.metric("Heme iron today", f"{heme_iron:.1f} mg")
+    m3.metric("7-day daily average", f"{week_iron / 7:.1f} mg")
     if total_iron < 8:
         st.warning("Your intake is lower than the recommended minimum (8–18 mg/day). Consider adding more iron-rich foods.")
     else:
         st.success("Great job! Your iron intake is within a healthy range.")
+
+iron_tracker(user)
@@ -1,17 +1,17 @@
 
 # BloodReady | Clean Version without Floating Bars or Image Gallery
 
+# Heavy modules (pandas, fpdf, smtplib) are imported by
+# the sections that use them so the form paints first on a cold start.
+# benchmarks/import_time.py guards the top-level import cost.
 import streamlit as st
 from datetime import datetime
-import base64
-from io import BytesIO
-from fpdf import FPDF
-import smtplib
-from email.message import EmailMessage
-import pandas as pd
+import hashlib
+import json
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import metrics
+from i18n import ELIGIBLE, FEMALE, GENDERS, NOT_ELIGIBLE, YES, YES_NO, YES_NO_UNKNOWN, available_locales, get_catalog
+from record_store import RECORDS_PATH, RecordStore
 
 st.set_page_config(
     page_title="BloodReady | Blood Donation Eligibility",
@@ -19,167 +19,625 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# --- Metrics ---
+# BLOODREADY_METRICS=1 times each section below; see metrics.py for the exporters
+@st.cache_resource
+def start_metrics():
+    metrics.start_exporters()
+
+start_metrics()
+
 # --- PDF Export Function ---
-def create_pdf(summary_text):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font('Arial', '', 12)
-    for line in summary_text.split('\n'):
-        pdf.cell(200, 10, txt=line, ln=True)
+# Font metrics and the page template are loaded once per process
+@st.cache_resource
+def get_report_engine():
+    from report import ReportEngine
+    return ReportEngine()
+
+# BLOODREADY_CACHE picks where rendered PDFs live: this process (default),
+# a SQLite file every process on the host shares, or Redis (see cache.py)
+@st.cache_resource
+def get_pdf_cache():
+    from cache import open_cache
+    return open_cache()
+
+# Rendered once per distinct result, on whichever replica sees it first;
+# the download button and the email share the bytes
+def render_pdf(report):
+    from cache import cache_key
+    cache = get_pdf_cache()
+    key = cache_key("pdf", report)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = get_report_engine().render(report)
+        cache.set(key, pdf)
     return pdf
 
-def get_pdf_download_link(pdf):
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    b64 = base64.b64encode(pdf_bytes).decode()
-    href = f'<a href="data:application/octet-stream;base64,{b64}" download="blood_eligibility_summary.pdf">📄 Download PDF Result</a>'
-    return href
+# --- Record Store ---
+# "csv" (default), "sqlite" or "parquet" (needs pyarrow) keep records on this
+# host; "redis" (needs redis) shares records, dashboard and trends across replicas
+RECORDS_BACKEND = os.environ.get("BLOODREADY_STORE", "csv")
+
+# Read connections for the sqlite backend, shared by every session
+@st.cache_resource
+def get_sqlite_pool():
+    from sqlite_store import ConnectionPool
+    return ConnectionPool()
+
+# One writer per server process, shared by every session
+@st.cache_resource
+def get_record_store():
+    if RECORDS_BACKEND == "sqlite":
+        from sqlite_store import SQLiteRecordStore
+        return SQLiteRecordStore(flush_interval=0.5)
+    if RECORDS_BACKEND == "redis":
+        from redis_store import RedisRecordStore
+        return RedisRecordStore(flush_interval=0.5)
+    if RECORDS_BACKEND == "parquet":
+        from columnar_store import ParquetRecordStore
+        return ParquetRecordStore(flush_interval=0.5)
+    return RecordStore(RECORDS_PATH, flush_interval=0.5)
+
+@st.cache_resource
+def get_dashboard_stats():
+    if RECORDS_BACKEND == "sqlite":
+        from sqlite_store import SQLiteDashboardStats
+        return SQLiteDashboardStats(get_sqlite_pool())
+    if RECORDS_BACKEND == "redis":
+        from redis_store import RedisDashboardStats
+        return RedisDashboardStats()
+    if RECORDS_BACKEND == "parquet":
+        from columnar_store import PARQUET_ROOT, ParquetDashboardStats
+        return ParquetDashboardStats(PARQUET_ROOT)
+    # The hot file plus the summaries of the segments the archiver rotated out
+    from archiver import ArchivedDashboardStats
+    return ArchivedDashboardStats(RECORDS_PATH)
+
+# The csv backend's hot file is rotated, compressed and pruned in the background (see archiver.py)
+@st.cache_resource
+def start_archiver():
+    from archiver import Archiver
+    return Archiver(RECORDS_PATH).start()
+
+# Bin counts come from the incremental aggregates; recomputed only when the data version moves
+@st.cache_data(max_entries=4, show_spinner=False)
+def age_histogram(version, _stats):
+    edges = _stats.age_bin_edges
+    return {"age": edges[:-1].tolist(), "count": _stats.age_counts.tolist()}
+
+@st.cache_resource
+def get_records_index():
+    if RECORDS_BACKEND == "sqlite":
+        from sqlite_store import SQLiteRecordsIndex
+        return SQLiteRecordsIndex(get_sqlite_pool())
+    if RECORDS_BACKEND == "redis":
+        from redis_store import RedisRecordsIndex
+        return RedisRecordsIndex()
+    if RECORDS_BACKEND == "parquet":
+        from columnar_store import PARQUET_ROOT, ParquetRecordsIndex
+        return ParquetRecordsIndex(PARQUET_ROOT)
+    from records_index import RecordsIndex
+    return RecordsIndex(RECORDS_PATH)
+
+RECORDS_PAGE_SIZE = 50
+
+# --- Trends ---
+# Counters per day / week / month, folded in as submissions are written;
+# a chart reads one row per bucket however long the history is
+TREND_BUCKETS = {"day": 30, "week": 26, "month": 24}
+TOP_REASONS = 5
+
+@st.cache_resource
+def get_rollup_writer():
+    if RECORDS_BACKEND == "redis":
+        from redis_store import RedisRollupWriter
+        return RedisRollupWriter(flush_interval=0.5)
+    from rollups import RollupWriter
+    return RollupWriter(flush_interval=0.5)
+
+@st.cache_resource
+def get_rollups():
+    if RECORDS_BACKEND == "redis":
+        from redis_store import RedisRollups
+        return RedisRollups()
+    from rollups import Rollups
+    return Rollups()
+
+@st.fragment
+def trends(locale):
+    from eligibility import get_rules
+    t = get_catalog(locale)
+    st.markdown(t("trends.heading"))
+    period = st.radio(
+        t("trends.period"), list(TREND_BUCKETS), key="trends_period", horizontal=True,
+        format_func=lambda p: t(f"trends.{p}"),
+    )
+    rollups = get_rollups()
+    trend = rollups.trend(period, datetime.today().date(), TREND_BUCKETS[period])
+    if not any(trend["submissions"]):
+        st.caption(t("trends.empty"))
+        return
+    first, last = trend["bucket"][0], trend["bucket"][-1]
+    c1, c2 = st.columns(2)
+    c1.line_chart(
+        {"bucket": trend["bucket"], t("trends.submissions"): trend["submissions"], t("trends.eligible"): trend["eligible"]},
+        x="bucket",
+    )
+    c2.line_chart({"bucket": trend["bucket"], t("trends.rate"): trend["eligibility_rate"]}, x="bucket", color="#d62828")
+    with c1:
+        st.markdown(t("trends.reasons"))
+        labels = {rule.id: rule.text.get(locale, rule.text["en"]) for rule in get_rules().rules}
+        top = rollups.totals(period, "reason", first, last).most_common(TOP_REASONS)
+        st.bar_chart({"reason": [labels.get(k, k) for k, _ in top], "count": [n for _, n in top]}, x="reason", y="count", horizontal=True, color="#fa8072")
+    with c2:
+        st.markdown(t("trends.hb"))
+        hb = rollups.hb_histogram(period, first, last)
+        hb["gender"] = [t.option(g) for g in hb["gender"]]
+        st.bar_chart(hb, x="hb", y="count", color="gender")
+    st.bar_chart({"bucket": trend["bucket"], t("trends.malaria"): trend["malaria_travel"]}, x="bucket", color="#fa8072")
+
+# Filtering, sorting and paging run server-side; only the visible page is sent
+@st.fragment
+def records_table(locale):
+    t = get_catalog(locale)
+    index = get_records_index()
+    index.refresh()
+    # The csv table lists the hot file only; rotated segments count in the
+    # dashboard totals, so the table is labeled and bounded to the hot window
+    archived = getattr(get_dashboard_stats(), "archived_rows", 0)
+    since = index.first_day() if archived else None
+    st.markdown(t("records.heading_since", since=since) if since else t("records.heading"))
+    if archived:
+        st.caption(t("records.archived", archived=archived))
+    f1, f2, f3, f4 = st.columns(4)
+    dates = f1.date_input(t("records.dates"), value=(), min_value=since, key="records_dates")
+    equals = {}
+    for col, column in zip((f2, f3, f4), ("eligible", "gender", "country")):
+        options = index.distinct(column)
+        # None is the "All" entry; codes in the records are shown as labels
+        choice = col.selectbox(
+            t(f"records.{column}"), [None, *options], key=f"records_{column}",
+            format_func=lambda k, o=options: t("records.all") if k is None else t.option(o.get(k, k)) if o.get(k, k) else t("records.blank"),
+        )
+        if choice is not None:
+            equals[column] = choice
+    s1, s2, s3 = st.columns([2, 1, 1])
+    sort_by = s1.selectbox(t("records.sort_by"), ["timestamp", "age", "weight", "hb"], key="records_sort")
+    descending = s2.toggle(t("records.descending"), value=True, key="records_desc")
+    page = s3.number_input(t("records.page"), min_value=1, value=1, step=1, key="records_page")
+    start, end = (tuple(dates) + (None, None))[:2]
+    total, rows = index.query(
+        start=start, end=end or start, equals=equals, sort_by=sort_by, descending=descending,
+        offset=(page - 1) * RECORDS_PAGE_SIZE, limit=RECORDS_PAGE_SIZE,
+    )
+    st.dataframe(rows, hide_index=True)
+    st.caption(t("records.summary", total=total, page=page, pages=max(1, -(-total // RECORDS_PAGE_SIZE))))
+
+# --- Malaria Risk Areas ---
+# data/malaria_areas.json compiled once per process
+@st.cache_resource
+def get_malaria_index():
+    from malaria_index import get_index
+    return get_index()
 
 # --- Email Sending ---
-def send_email(to_email, subject, body, pdf_buffer):
-    msg = EmailMessage()
-    msg['Subject'] = subject
-    msg['From'] = 'your_email@example.com'
-    msg['To'] = to_email
-    msg.set_content(body)
-    msg.add_attachment(pdf_buffer.getvalue(), maintype='application', subtype='pdf', filename='blood_eligibility_summary.pdf')
-    with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-        smtp.login('your_email@example.com', 'your_password')
-        smtp.send_message(msg)
+# Delivery runs on background workers; the page only queues and polls status
+@st.cache_resource
+def get_outbox():
+    from mailer import OUTBOX_PATH, Outbox
+    return Outbox(OUTBOX_PATH)
+
+def email_status(t, status, error):
+    from mailer import FAILED, SENT
+    if status == SENT:
+        st.success(t("email.sent"))
+    elif status == FAILED:
+        st.warning(t("email.failed", error=error))
+    else:
+        st.info(t("email.sending"))
+
+# Polls only while delivery is pending; a final status ends the polling
+# (email_id is dropped) and is shown from session_state afterwards
+@st.fragment(run_every=2)
+def poll_email_status(message_id, locale):
+    from mailer import FAILED, SENT
+    status, error = get_outbox().status(message_id)
+    if status in (SENT, FAILED):
+        del st.session_state["email_id"]
+        st.session_state["email_status"] = (status, error)
+        st.rerun()
+    email_status(get_catalog(locale), status, error)
+
+# --- Donor History ---
+# Opt-in: returning donors are recognized by a keyed hash of their email or
+# phone, and organizers see who becomes eligible from an index on that date.
+@st.cache_resource
+def get_donor_index():
+    from donor_index import DonorIndex
+    return DonorIndex()
+
+# Off unless the deployment sets its own BLOODREADY_DONOR_SALT
+@st.cache_resource
+def donor_history_enabled():
+    from donor_index import enabled
+    return enabled()
+
+# History is kept and shown only for a contact this session has verified
+# with a code mailed to it; phone numbers cannot be verified yet
+def verify_contact(contact, donor, t):
+    from donor_index import Challenge, verifiable
+    verified = st.session_state.setdefault("donor_verified", set())
+    if donor in verified:
+        return True
+    if not verifiable(contact):
+        st.caption(t("donor.phone_unverified"))
+        return False
+    challenge = st.session_state.get("donor_challenge")
+    if challenge is None or challenge.donor != donor or challenge.spent:
+        if st.button(t("donor.send_code")):
+            challenge, code = Challenge.issue(donor)
+            st.session_state["donor_challenge"] = challenge
+            get_outbox().send(contact, t("donor.code_subject"), t("donor.code_body", code=code))
+        else:
+            st.caption(t("donor.unverified"))
+            return False
+    code = st.text_input(t("donor.code"), key=f"donor_code_{challenge.digest[:8]}")
+    if not code:
+        return False
+    if challenge.check(code):
+        verified.add(donor)
+        del st.session_state["donor_challenge"]
+        return True
+    st.warning(t("donor.code_wrong"))
+    return False
+
+@st.fragment
+def donor_forecast(locale):
+    from datetime import timedelta
+    t = get_catalog(locale)
+    index = get_donor_index()
+    if not index.any():
+        return
+    st.markdown(t("donor.forecast_heading"))
+    tomorrow = datetime.today().date() + timedelta(days=1)
+    dates = st.date_input(t("donor.forecast_dates"), value=(tomorrow, tomorrow + timedelta(days=6)), key="donor_forecast_dates")
+    start, end = (tuple(dates) + (None, None))[:2]
+    if start is None:
+        return
+    counts = index.forecast(start, end or start)
+    total, rows = index.becoming_eligible(start, end or start, limit=RECORDS_PAGE_SIZE)
+    st.caption(t("donor.forecast_total", total=total))
+    if counts:
+        st.bar_chart({"day": [d for d, _ in counts], "donors": [n for _, n in counts]}, x="day", y="donors", color="#fa8072")
+        st.dataframe(rows, hide_index=True)
+
+# --- Bulk Pre-screen ---
+# Organizers upload the drive's registration list instead of filling in the form.
+# The file is screened chunk by chunk into a temporary CSV that is only read
+# back when the download is clicked, and swept an hour later if nobody did.
+@st.cache_resource
+def start_result_sweeper():
+    import bulk_screen
+    return bulk_screen.start_sweeper()
+
+def bulk_prescreen(locale):
+    import bulk_screen as bulk
+    start_result_sweeper()
+    t = get_catalog(locale)
+    st.subheader(t("bulk.heading"))
+    st.caption(t("bulk.help"))
+    upload = st.file_uploader(t("bulk.upload"), type=["csv", "xlsx"], key="bulk_upload")
+    if upload is None:
+        return
+    try:
+        columns = bulk.read_columns(upload, upload.name)
+    except Exception as e:
+        st.error(t("bulk.failed", error=e))
+        return
+    detected = bulk.match_columns(columns)
+
+    st.markdown(t("bulk.columns"))
+    mapping = {}
+    grid = st.columns(4)
+    for i, field in enumerate(bulk.FIELDS):
+        options = [None, *columns]
+        choice = grid[i % 4].selectbox(
+            bulk.field_label(t, field), options, index=options.index(detected.get(field)),
+            key=f"bulk_{upload.file_id}_{field}", format_func=lambda c: t("bulk.unmapped") if c is None else c,
+        )
+        if choice is not None:
+            mapping[field] = choice
+    missing = [bulk.field_label(t, f) for f in bulk.REQUIRED if f not in mapping]
+    if missing:
+        st.warning(t("bulk.required", fields=", ".join(missing)))
+        return
+
+    run_key = (upload.file_id, tuple(sorted(mapping.items())), locale)
+    if st.button(t("bulk.run"), type="primary"):
+        previous = st.session_state.pop("bulk_result", None)
+        if previous and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+        fd, path = bulk.result_file()
+        progress = st.empty()
+        try:
+            with metrics.span("bulk_screen"), open(fd, "w", newline="", encoding="utf-8-sig") as out:
+                rows = eligible = 0
+                for rows, eligible in bulk.screen(upload, upload.name, mapping, out, locale=locale):
+                    progress.info(t("bulk.progress", rows=rows))
+        except Exception as e:
+            os.remove(path)
+            progress.error(t("bulk.failed", error=e))
+            return
+        progress.empty()
+        st.session_state["bulk_result"] = {"key": run_key, "path": path, "rows": rows, "eligible": eligible}
+
+    result = st.session_state.get("bulk_result")
+    if result and not os.path.exists(result["path"]):
+        # Swept after RESULT_TTL; the list has to be screened again
+        del st.session_state["bulk_result"]
+        result = None
+    if result and result["key"] == run_key:
+        def screened_csv(path=result["path"]):
+            with open(path, "rb") as f:
+                return f.read()
+        st.success(t("bulk.summary", rows=result["rows"], eligible=result["eligible"], not_eligible=result["rows"] - result["eligible"]))
+        st.download_button(
+            t("bulk.download"), data=screened_csv,
+            file_name=f"{os.path.splitext(upload.name)[0]}_screened.csv", mime="text/csv", on_click="ignore",
+        )
 
 # --- Language Pref ---
-language = st.sidebar.radio("🌐 Language / 언어", ["English", "한국어"])
-is_kr = language == "한국어"
+# Catalogs are loaded once per process; `t` looks up the current locale
+locale = st.sidebar.radio("🌐 Language / 언어", available_locales(), format_func=lambda code: get_catalog(code)("language.name"))
+t = get_catalog(locale)
 
 # --- Sidebar Info ---
 with st.sidebar:
-    st.markdown("## 🧾 Info")
-    if is_kr:
-        st.markdown("이 도구는 헌혈 자격 조건을 사전에 확인할 수 있도록 제작되었습니다.")
-        st.markdown("헌혈 기준은 대한적십자사의 공식 가이드를 따릅니다.")
-    else:
-        st.markdown("This tool helps you check if you're eligible to donate blood before visiting a donation center.")
-        st.markdown("Eligibility follows guidelines from the Korean Red Cross.")
-    st.markdown("**Made by Ahyoung Bella Kim, Co-Chair of ABO Supporters**")
+    st.markdown(t("sidebar.heading"))
+    st.markdown(t("sidebar.about"))
+    st.markdown(t("sidebar.source"))
+    st.markdown(t("sidebar.credit"))
+    bulk_mode = st.toggle(t("bulk.mode"), key="bulk_mode")
+
+# --- Admin ---
+# BLOODREADY_ADMIN=1 adds an operator panel: an opt-in cProfile of each rerun
+# and the current metrics. Donors never see it and nothing is profiled by default.
+ADMIN = os.environ.get("BLOODREADY_ADMIN", "") not in ("", "0")
+profiler = None
+if ADMIN:
+    # A rerun interrupted by a widget change never reached the report below
+    stale = st.session_state.pop("admin_profiler", None)
+    if stale is not None:
+        stale.disable()
+    with st.sidebar:
+        st.markdown(t("admin.heading"))
+        if st.toggle(t("admin.profile"), key="admin_profile"):
+            import cProfile
+            profiler = st.session_state["admin_profiler"] = cProfile.Profile()
+            profiler.enable()
+        admin_panel = st.container()
 
 # --- Styling ---
-st.markdown("""<style>
-html, body, [class*='css'] {
-    font-family: 'Helvetica Neue', sans-serif;
-    background-color: #fefefe;
-    color: #111827;
-}
-.section {
-    background-color: white;
-    padding: 2rem;
-    margin: 2rem auto;
-    border-radius: 20px;
-    border: 2px solid #f3c5c5;
-    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.04);
-}
-</style>""", unsafe_allow_html=True)
+# The stylesheet is a fingerprinted file under static/ (see static_assets.py):
+# browsers fetch it once and each rerun re-sends only the <link>. Without
+# static serving (config outside .streamlit/) the CSS is inlined instead.
+@st.cache_resource
+def get_static_assets():
+    import static_assets
+    return static_assets.build()
+
+st.markdown(
+    get_static_assets().stylesheet("bloodready.css", inline=not st.get_option("server.enableStaticServing")),
+    unsafe_allow_html=True,
+)
 
 # --- Title ---
-st.markdown("""<div class='section'>
-<h1 style='text-align:center; color:#d62828;'>BloodReady | 헌혈 자격 셀프 체크</h1>
-<p style='text-align:center; color:#e63946;'>당신의 따뜻함이 생명이 됩니다.<br>Your Warmth Can Save a Life.</p>
+st.markdown("""<div class='section title'>
+<h1>BloodReady | 헌혈 자격 셀프 체크</h1>
+<p>당신의 따뜻함이 생명이 됩니다.<br>Your Warmth Can Save a Life.</p>
 </div>""", unsafe_allow_html=True)
 
+if bulk_mode:
+    bulk_prescreen(locale)
+    st.stop()
+
 # --- Form ---
+# Widgets hold answer codes ("yes", "female"); the catalog only supplies labels
+form_span = metrics.span("form_render")
 st.markdown("<div class='section'>", unsafe_allow_html=True)
-st.subheader("🩸 " + ("정보 입력" if is_kr else "Fill in your details"))
-
-gender = st.radio("성별 / Gender", ["여성 / Female", "남성 / Male", "기타 / Other"] if is_kr else ["Female", "Male", "Other"])
-if "여성" in gender or gender == "Female":
-    menstruating = st.radio("현재 생리 중입니까?" if is_kr else "Are you currently on your period?", ["예 / Yes", "아니요 / No", "모름" if is_kr else "Prefer not to say"])
-    pregnancy = st.radio("현재 임신 중이거나 출산 직후입니까?" if is_kr else "Are you pregnant or recently gave birth?", ["예 / Yes", "아니요 / No"])
-
-donation_date = st.date_input("마지막 헌혈 날짜" if is_kr else "Last blood donation date", value=datetime.today())
-tattoo = st.radio("최근 문신/피어싱 여부" if is_kr else "Recent tattoo/piercing?", ["예 / Yes", "아니요 / No"])
-age = st.slider("나이" if is_kr else "Age", 10, 100, 20)
-weight = st.slider("체중 (kg)" if is_kr else "Weight (kg)", 30, 150, 60)
-feeling_well = st.radio("오늘 건강하십니까?" if is_kr else "Feeling well today?", ["예 / Yes", "아니요 / No"])
-hb = st.slider("헤모글로빈 수치 (g/dL)" if is_kr else "Hemoglobin (Hb) Level (g/dL)", 5.0, 20.0, 13.0, step=0.1)
-meds = st.radio("약 복용 여부" if is_kr else "Currently on medication?", ["예 / Yes", "아니요 / No"])
-travel = st.radio("최근 1년간 해외여행 여부" if is_kr else "Have you traveled abroad recently?", ["예 / Yes", "아니요 / No"])
-email = st.text_input("이메일 입력 (선택)" if is_kr else "Enter email (optional for PDF)")
+st.subheader(t("form.heading"))
+
+# Nothing about the donor is kept unless they opt in
+donor, donor_info, donor_verified = None, None, False
+if st.toggle(
+    t("donor.remember"), key="donor_remember", disabled=not donor_history_enabled(),
+    help=t("donor.help") if donor_history_enabled() else t("donor.disabled"),
+):
+    from donor_index import donor_key
+    contact = st.text_input(t("donor.contact"), key="donor_contact")
+    donor = donor_key(contact)
+    if contact and donor is None:
+        st.warning(t("donor.invalid"))
+    elif donor and verify_contact(contact, donor, t):
+        donor_verified = True
+        donor_info = get_donor_index().donor(donor)
+        if donor_info:
+            st.info(t(
+                "donor.welcome", visits=donor_info["visits"],
+                last_donation=donor_info["last_donation"] or t("donor.unknown"),
+                next=donor_info["next_eligible"] or t("donor.unknown"),
+            ))
+        else:
+            st.caption(t("donor.first_visit"))
+
+gender = st.radio(t("form.gender"), GENDERS, format_func=t.option)
+menstruating, pregnancy = "", ""
+if gender == FEMALE:
+    menstruating = st.radio(t("form.menstruating"), YES_NO_UNKNOWN, format_func=t.option)
+    pregnancy = st.radio(t("form.pregnancy"), YES_NO, format_func=t.option)
+
+# Empty for first-time donors (no 56-day rule); a returning donor's last
+# donation on record is the starting answer
+last_donation = donor_info["last_donation"] if donor_info else None
+donation_date = st.date_input(t("form.donation_date"), value=last_donation, help=t("form.donation_date_help"))
+tattoo = st.radio(t("form.tattoo"), YES_NO, format_func=t.option)
+age = st.slider(t("form.age"), 10, 100, 20)
+weight = st.slider(t("form.weight"), 30, 150, 60)
+feeling_well = st.radio(t("form.well"), YES_NO, format_func=t.option)
+hb = st.slider(t("form.hb"), 5.0, 20.0, 13.0, step=0.1)
+meds = st.radio(t("form.meds"), YES_NO, format_func=t.option)
+travel = st.radio(t("form.travel"), YES_NO, format_func=t.option)
+email = st.text_input(t("form.email"))
 country, region = "", ""
 malaria_risk = False
 
-if "예" in travel or travel == "Yes":
-    country = st.text_input("방문 국가" if is_kr else "Country visited")
-    region = st.text_input("방문 지역" if is_kr else "Region visited")
-    malaria_data = {"India": ["Odisha", "Assam"], "Philippines": ["Palawan", "Mindanao"], "Indonesia": ["Papua", "Kalimantan"]}
-    if country in malaria_data:
-        if any(r.lower() in region.lower() for r in malaria_data[country]):
-            malaria_risk = True
+# The travel question covers stays in Korea too: the risk areas include
+# domestic regions (Paju, Ganghwa, Cheorwon...), picked under Korea
+if travel == YES:
+    # Searchable pickers; free text is still accepted and resolved through aliases
+    malaria_areas = get_malaria_index()
+    is_kr = locale == "ko"
+    country = st.selectbox(
+        t("form.country"), malaria_areas.countries(), index=None,
+        accept_new_options=True, format_func=lambda n: malaria_areas.label(n, is_kr),
+    ) or ""
+    region = st.selectbox(
+        t("form.region"), malaria_areas.regions(country), index=None,
+        accept_new_options=True, format_func=lambda n: malaria_areas.label(n, is_kr, country),
+    ) or ""
+    malaria_risk = malaria_areas.match(country, region) is not None
+form_span.stop()
 
-if st.button("결과 확인" if is_kr else "Check Eligibility"):
-    try:
-        days_since = (datetime.today() - donation_date).days
-    except:
-        days_since = 9999
-    eligible = True
-    reasons = []
-    if age < 16: eligible, reasons = False, reasons + ["16세 미만" if is_kr else "Under 16"]
-    if weight < 50: eligible, reasons = False, reasons + ["50kg 미만" if is_kr else "Under 50 kg"]
-    if "아니요" in feeling_well or feeling_well == "No": eligible, reasons = False, reasons + ["컨디션 불량" if is_kr else "Not feeling well"]
-    if hb < 12.5: eligible, reasons = False, reasons + ["Hb 수치 낮음" if is_kr else "Low hemoglobin"]
-    if "예" in meds or meds == "Yes": eligible, reasons = False, reasons + ["약 복용 중" if is_kr else "Currently on medication"]
-    if malaria_risk: eligible, reasons = False, reasons + ["말라리아 위험 지역 방문" if is_kr else "Visited malaria-risk region"]
-    if ("여성" in gender or gender == "Female"):
-        if "예" in menstruating or menstruating == "Yes":
-            reasons.append("생리 중" if is_kr else "Currently menstruating")
-        if "예" in pregnancy or pregnancy == "Yes":
-            eligible, reasons = False, reasons + ["임신 또는 출산 직후" if is_kr else "Pregnant or recently gave birth"]
-    if days_since < 56: eligible, reasons = False, reasons + ["8주 이내 헌혈" if is_kr else "Donated within 8 weeks"]
-    if "예" in tattoo or tattoo == "Yes": eligible, reasons = False, reasons + ["문신/피어싱 있음" if is_kr else "Recent tattoo/piercing"]
-
-    result_msg = "적합함" if eligible and is_kr else "부적합함" if not eligible and is_kr else "Eligible" if eligible else "Not Eligible"
-    summary = f"Age: {age}\nWeight: {weight}kg\nHb: {hb}\nEligible: {result_msg}\nReasons:\n" + "\n".join(reasons)
+# --- Result ---
+# Results live in session_state keyed by a hash of the answers, so they survive
+# reruns and resubmitting the same answers neither recomputes nor re-records.
+MAX_SESSION_RESULTS = 16
+answers = dict(
+    age=age, weight=weight, hb=round(hb, 1), well=feeling_well, meds=meds,
+    tattoo=tattoo, gender=gender, menstruating=menstruating, pregnancy=pregnancy,
+    donation_date=donation_date, malaria_risk=malaria_risk,
+)
+today = datetime.today().date()
+answers_key = hashlib.sha256(json.dumps(
+    [answers, travel, country.strip().casefold(), region.strip().casefold(), str(today), donor],
+    sort_keys=True, default=str,
+).encode()).hexdigest()
+results = st.session_state.setdefault("results", {})
+
+submitted = st.button(t("form.submit"))
+if submitted:
+    if answers_key not in results:
+        from eligibility import check, deferral_dates
+        with metrics.span("eligibility_check"):
+            eligible, reason_mask = check(**answers)
+            deferral_ends, next_eligible = deferral_dates(reason_mask, **answers)
+        metrics.count("checks_eligible" if eligible else "checks_not_eligible")
+        results[answers_key] = {
+            "eligible": eligible, "mask": reason_mask, "ends": deferral_ends,
+            "next": next_eligible, "pdf": {}, "emailed": set(),
+        }
+        # Keep the session footprint bounded
+        while len(results) > MAX_SESSION_RESULTS:
+            results.pop(next(iter(results)))
+
+        # Codes, not display strings, so records are compact and language-neutral
+        record = {
+            "age": age, "weight": weight, "gender": gender,
+            "hb": hb, "well": feeling_well, "meds": meds,
+            "travel": travel, "country": country, "region": region,
+            "donation_date": str(donation_date or ""), "tattoo": tattoo,
+            "eligible": ELIGIBLE if eligible else NOT_ELIGIBLE, "timestamp": str(datetime.now())
+        }
+        with metrics.span("records_append"):
+            get_record_store().append(record)
+            get_rollup_writer().append({
+                "day": today, "eligible": eligible, "mask": reason_mask, "gender": gender,
+                "hb": hb, "malaria_risk": malaria_risk,
+            })
+        # Only a verified contact gets history, so nobody can write (or read) another donor's dates
+        if donor_verified:
+            with metrics.span("donor_record"):
+                recorded = get_donor_index().record(donor, today, donation_date, eligible, reason_mask, next_eligible)
+            results[answers_key]["donor_next"] = recorded["next_eligible"]
+    st.session_state["result_key"] = answers_key
+
+# Shown until an answer changes
+entry = results.get(answers_key) if st.session_state.get("result_key") == answers_key else None
+if entry:
+    from eligibility import reason_labels
+    eligible = entry["eligible"]
+    reasons = reason_labels(entry["mask"], locale, until=entry["ends"])
 
     st.markdown("<div class='section'>", unsafe_allow_html=True)
-    st.subheader("결과 / Result")
+    st.subheader(t("result.heading"))
     if eligible:
-        st.success("✅ 헌혈이 가능합니다!" if is_kr else "✅ You are eligible to donate blood!")
+        st.success(t("result.eligible_message"))
     else:
-        st.error("❌ 현재 헌혈이 불가능합니다." if is_kr else "❌ You are not eligible to donate blood at this time.")
+        st.error(t("result.not_eligible_message"))
         for r in reasons:
             st.markdown(f"- {r}")
+        if entry["next"]:
+            st.info(t("result.next_eligible", date=entry["next"]))
+    # History can push the date past what this visit's answers alone give
+    donor_next = entry.get("donor_next")
+    if donor_next and donor_next > today and donor_next != entry["next"]:
+        st.info(t("donor.history_next", date=donor_next))
     st.markdown("</div>", unsafe_allow_html=True)
 
-    record = {
-        "age": age, "weight": weight, "gender": gender,
-        "hb": hb, "well": feeling_well, "meds": meds,
-        "travel": travel, "country": country, "region": region,
-        "donation_date": str(donation_date), "tattoo": tattoo,
-        "eligible": result_msg, "timestamp": str(datetime.now())
-    }
-    df = pd.DataFrame([record])
-    df.to_csv("eligibility_records.csv", mode='a', header=not os.path.exists("eligibility_records.csv"), index=False)
-
-    pdf = create_pdf(summary)
-    st.markdown(get_pdf_download_link(pdf), unsafe_allow_html=True)
-    if email:
-        try:
-            buffer = BytesIO(pdf.output(dest='S').encode('latin1'))
-            send_email(email, "Your Blood Donation Eligibility Result", "Please find attached your PDF summary.", buffer)
-            st.success("📧 PDF sent to your email!")
-        except Exception as e:
-            st.warning(f"Email failed: {e}")
+    # One PDF per locale per result
+    pdf_bytes = entry["pdf"].get(locale)
+    if pdf_bytes is None:
+        report = {
+            "age": age, "weight": weight, "hb": hb, "eligible": eligible,
+            "result": t(f"result.{ELIGIBLE if eligible else NOT_ELIGIBLE}"), "reasons": reasons,
+            "locale": locale, "date": str(today),
+        }
+        with metrics.span("pdf_render"):
+            pdf_bytes = entry["pdf"][locale] = render_pdf(report)
+    st.download_button(t("result.download"), pdf_bytes, file_name="blood_eligibility_summary.pdf", mime="application/pdf", on_click="ignore")
+    # Emails go out on an explicit submit, once per address
+    if submitted and email and email not in entry["emailed"]:
+        entry["emailed"].add(email)
+        with metrics.span("email_send"):
+            st.session_state["email_id"] = get_outbox().send(email, t("email.subject"), t("email.body"), pdf_bytes)
+            st.session_state.pop("email_status", None)
+
+if "email_id" in st.session_state:
+    poll_email_status(st.session_state["email_id"], locale)
+elif "email_status" in st.session_state:
+    email_status(t, *st.session_state["email_status"])
 
 # --- Dashboard ---
-if os.path.exists("eligibility_records.csv"):
+dashboard_span = metrics.span("dashboard_load")
+if RECORDS_BACKEND == "csv":
+    start_archiver()
+dashboard_stats = get_dashboard_stats()
+dashboard_stats.refresh()
+if dashboard_stats.total:
     st.markdown("<div class='section'>", unsafe_allow_html=True)
-    st.subheader("📊 Dashboard")
-    dashboard_df = pd.read_csv("eligibility_records.csv")
+    st.subheader(t("dashboard.heading"))
     col1, col2 = st.columns(2)
-    col1.metric("Total Submissions", len(dashboard_df))
-    col1.metric("Eligible", (dashboard_df["eligible"] == "Eligible").sum())
-    col1.metric("Not Eligible", (dashboard_df["eligible"] == "Not Eligible").sum())
+    col1.metric(t("dashboard.total"), dashboard_stats.total)
+    col1.metric(t("dashboard.eligible"), dashboard_stats.eligible)
+    col1.metric(t("dashboard.not_eligible"), dashboard_stats.not_eligible)
     with col2:
-        fig = plt.figure()
-        sns.histplot(dashboard_df["age"], bins=20, kde=True, color="salmon")
-        plt.title("Age Distribution")
-        st.pyplot(fig)
-    st.dataframe(dashboard_df)
+        st.markdown(t("dashboard.age_distribution"))
+        st.bar_chart(age_histogram(dashboard_stats.version, dashboard_stats), x="age", y="count", color="#fa8072")
+    trends(locale)
+    records_table(locale)
+    donor_forecast(locale)
     st.markdown("</div>", unsafe_allow_html=True)
+dashboard_span.stop()
+
+# --- Admin Report ---
+if profiler is not None:
+    import io
+    import pstats
+    profiler.disable()
+    del st.session_state["admin_profiler"]
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).sort_stats("cumulative")
+    stats.print_stats(30)
+    admin_panel.expander(t("admin.profile_result", seconds=stats.total_tt), expanded=True).code(out.getvalue())
+if ADMIN and metrics.ENABLED:
+    admin_panel.expander(t("admin.metrics")).code(metrics.REGISTRY.render())
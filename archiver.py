@@ -0,0 +1,435 @@
+# BloodReady | Records Archiver
+# Keeps the active records CSV small. A background pass rotates it into the
+# archive directory by size or age, streams each closed segment into a
+# compressed copy plus a compact summary, and applies the retention and
+# PII-minimization policy to archived segments. The dashboard adds the
+# summaries to what it reads from the hot file; the records table lists the
+# hot file only and says so.
+#
+#   BLOODREADY_ARCHIVE_DIR=records_archive   (same filesystem as the records file)
+#   BLOODREADY_ROTATE_BYTES=4194304          rotate past this size...
+#   BLOODREADY_ROTATE_DAYS=30                ...or once the oldest row is this many days old
+#                                            (or older than the shortest retention/redaction window)
+#   BLOODREADY_ARCHIVE_CODEC=zstd            zstd (needs zstandard) or gzip
+#   BLOODREADY_RETENTION_DAYS=730            delete archived rows this old (unset keeps them)
+#   BLOODREADY_REDACT=region:30              blank fields in rows older than N days
+#
+#   python archiver.py [records.csv]         one rotate / compact / policy pass
+
+import csv
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+from dashboard_stats import AGE_BIN_EDGES, DashboardStats
+from record_store import RECORDS_PATH, same_file
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: one process, nothing to coordinate with
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get("BLOODREADY_ARCHIVE_DIR", "records_archive")
+ROTATE_BYTES = int(os.environ.get("BLOODREADY_ROTATE_BYTES", 4 << 20))
+ROTATE_DAYS = int(os.environ.get("BLOODREADY_ROTATE_DAYS") or 0)
+RETENTION_DAYS = int(os.environ.get("BLOODREADY_RETENTION_DAYS") or 0)
+INTERVAL = 60.0
+AGE_CHUNK = 10_000
+SUFFIXES = {"zstd": ".csv.zst", "gzip": ".csv.gz"}
+
+
+def _default_codec():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def parse_policy(spec):
+    """"region:30,country:365" -> {"region": 30, "country": 365}."""
+    policy = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        field, _, days = item.partition(":")
+        policy[field.strip()] = int(days)
+    return policy
+
+
+CODEC = os.environ.get("BLOODREADY_ARCHIVE_CODEC") or _default_codec()
+REDACT = parse_policy(os.environ.get("BLOODREADY_REDACT"))
+
+
+# --- Segment Files ---
+def _open(path, mode):
+    """Text stream over a compressed segment; the codec follows the suffix."""
+    if path.endswith(".zst"):
+        import zstandard
+
+        return zstandard.open(path, mode, encoding="utf-8", newline="")
+    return gzip.open(path, mode, compresslevel=6, encoding="utf-8", newline="")
+
+
+def _tmp(path):
+    # Same suffix, so _open picks the same codec
+    return os.path.join(os.path.dirname(path), ".tmp-" + os.path.basename(path))
+
+
+def _day(timestamp):
+    try:
+        return date.fromisoformat(timestamp[:10])
+    except ValueError:
+        return None
+
+
+def _first_day(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        row = next(csv.DictReader(f), None)
+    return None if row is None else _day(row.get("timestamp") or "")
+
+
+def _summaries(archive_dir):
+    return sorted(glob.glob(os.path.join(archive_dir, "records-*.json")))
+
+
+def _read_summary(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, value):
+    tmp = _tmp(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+
+# --- Rotation and Compaction ---
+def rotate_days(max_days=ROTATE_DAYS, retention_days=RETENTION_DAYS, redact=REDACT):
+    """Age in days at which the oldest hot row forces a rotation; 0 rotates by size only.
+
+    Retention and redaction only reach archived segments, so the hot file
+    never holds a row past the shortest of those windows.
+    """
+    return min((days for days in (max_days, retention_days, *redact.values()) if days), default=0)
+
+
+def rotate(path=RECORDS_PATH, archive_dir=ARCHIVE_DIR, max_bytes=ROTATE_BYTES, max_days=ROTATE_DAYS, today=None):
+    """Move the hot file into the archive once it is too big or too old.
+
+    Returns the closed segment's path, or None. The rename happens under the
+    writers' file lock; a writer that was waiting on it sees the file moved
+    and reopens the path (RecordStore._append).
+    """
+    today = today or date.today()
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+    first = _first_day(path) if size else None
+    if first is None:
+        return None
+    if size < max_bytes and not (max_days and first <= today - timedelta(days=max_days)):
+        return None
+    os.makedirs(archive_dir, exist_ok=True)
+    segment = os.path.join(archive_dir, f"records-{first.isoformat()}-{uuid.uuid4().hex[:8]}.csv")
+    with open(path, "a", encoding="utf-8") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if not same_file(f, path):
+                return None
+            os.rename(path, segment)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    return segment
+
+
+def compact(segment, codec=CODEC, redact=REDACT, today=None):
+    """Stream a closed CSV segment into its compressed copy and summary, then
+    delete it. Memory stays bounded by one row and AGE_CHUNK ages."""
+    today = today or date.today()
+    stem = segment[:-len(".csv")]
+    data = stem + SUFFIXES[codec]
+    source = os.stat(segment)
+    cutoffs = {field: today - timedelta(days=days) for field, days in redact.items()}
+    rows, results = 0, Counter()
+    age_counts = np.zeros(len(AGE_BIN_EDGES) - 1, dtype=np.int64)
+    ages, first, last = [], None, None
+    with open(segment, newline="", encoding="utf-8") as src, _open(_tmp(data), "wt") as out:
+        reader, writer = csv.reader(src), csv.writer(out)
+        header = next(reader, [])
+        writer.writerow(header)
+        cols = {name: i for i, name in enumerate(header)}
+        ts_col, result_col, age_col = cols.get("timestamp"), cols.get("eligible"), cols.get("age")
+        blanks = [(cols[field], cutoff) for field, cutoff in cutoffs.items() if field in cols]
+        for row in reader:
+            if not row:
+                continue
+            rows += 1
+            day = _day(row[ts_col]) if ts_col is not None and ts_col < len(row) else None
+            if day is not None:
+                first = day if first is None else min(first, day)
+                last = day if last is None else max(last, day)
+            if result_col is not None and result_col < len(row):
+                results[row[result_col]] += 1
+            if age_col is not None and age_col < len(row):
+                try:
+                    ages.append(float(row[age_col]))
+                except ValueError:
+                    pass
+            if len(ages) >= AGE_CHUNK:
+                age_counts += np.histogram(ages, bins=AGE_BIN_EDGES)[0]
+                ages.clear()
+            for i, cutoff in blanks:
+                if day is not None and day < cutoff and i < len(row):
+                    row[i] = ""
+            writer.writerow(row)
+    if ages:
+        age_counts += np.histogram(ages, bins=AGE_BIN_EDGES)[0]
+    os.replace(_tmp(data), data)
+    _write_json(stem + ".json", {
+        "file": os.path.basename(data),
+        "source": [source.st_dev, source.st_ino],
+        "rows": rows,
+        "results": dict(results),
+        "age_bin_edges": AGE_BIN_EDGES.tolist(),
+        "age_counts": age_counts.tolist(),
+        "first_day": first and first.isoformat(),
+        "last_day": last and last.isoformat(),
+        # Fields no row of the segment still holds
+        "redacted": sorted(f for f, cutoff in cutoffs.items() if last is not None and last < cutoff),
+        # Fields blanked only in rows before the given day
+        "redacted_before": {
+            f: cutoff.isoformat() for f, cutoff in cutoffs.items()
+            if first is not None and first < cutoff <= last
+        },
+        "purged": None,
+    })
+    os.remove(segment)
+    return data
+
+
+def _rewrite(data, cutoffs):
+    """Blank each field in the rows dated before its cutoff (None: in every row)."""
+    with _open(data, "rt") as src, _open(_tmp(data), "wt") as out:
+        reader, writer = csv.reader(src), csv.writer(out)
+        header = next(reader, [])
+        writer.writerow(header)
+        ts_col = header.index("timestamp") if "timestamp" in header else None
+        blank = [(header.index(f), cutoff) for f, cutoff in cutoffs.items() if f in header]
+        for row in reader:
+            day = _day(row[ts_col]) if ts_col is not None and ts_col < len(row) else None
+            for i, cutoff in blank:
+                if i < len(row) and (cutoff is None or (day is not None and day < cutoff)):
+                    row[i] = ""
+            writer.writerow(row)
+    os.replace(_tmp(data), data)
+
+
+def enforce(archive_dir=ARCHIVE_DIR, retention_days=RETENTION_DAYS, redact=REDACT, today=None):
+    """Apply retention and redaction to archived segments; returns how many changed.
+
+    A purged segment's rows are deleted but its summary stays, so the
+    dashboard's all-time counts do not drop.
+    """
+    today = today or date.today()
+    changed = 0
+    for path in _summaries(archive_dir):
+        summary = _read_summary(path)
+        if summary["purged"] or summary["last_day"] is None:
+            continue
+        last = date.fromisoformat(summary["last_day"])
+        data = os.path.join(archive_dir, summary["file"])
+        if retention_days and last < today - timedelta(days=retention_days):
+            if os.path.exists(data):
+                os.remove(data)
+            summary["purged"] = today.isoformat()
+        else:
+            # A segment straddling a window is rewritten at most once a day
+            # until its last row is past it too
+            first = date.fromisoformat(summary["first_day"])
+            partial = summary.setdefault("redacted_before", {})
+            due = {}
+            for field, days in redact.items():
+                cutoff = today - timedelta(days=days)
+                if field in summary["redacted"]:
+                    continue
+                if last < cutoff:
+                    due[field] = None
+                elif first < cutoff and partial.get(field, "") < cutoff.isoformat():
+                    due[field] = cutoff
+            if not due:
+                continue
+            _rewrite(data, due)
+            summary["redacted"] = sorted(summary["redacted"] + [f for f, cutoff in due.items() if cutoff is None])
+            partial.update({f: cutoff.isoformat() for f, cutoff in due.items() if cutoff is not None})
+            for field in summary["redacted"]:
+                partial.pop(field, None)
+        _write_json(path, summary)
+        changed += 1
+    return changed
+
+
+# --- Background Pass ---
+class Archiver:
+    """Runs `run_once` on a daemon thread every `interval` seconds."""
+
+    def __init__(self, path=RECORDS_PATH, archive_dir=ARCHIVE_DIR, interval=INTERVAL, max_bytes=ROTATE_BYTES,
+                 max_days=ROTATE_DAYS, codec=CODEC, retention_days=RETENTION_DAYS, redact=REDACT):
+        self.path = path
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_days = max_days
+        self.codec = codec
+        self.retention_days = retention_days
+        self.redact = redact
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="records-archiver", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("Archiving %s failed", self.path)
+            if self._stop.wait(self.interval):
+                return
+
+    def run_once(self, today=None):
+        """Rotate, compact closed segments and apply the policy. Replicas sharing
+        the archive take turns; a pass already running elsewhere is skipped."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(os.path.join(self.archive_dir, ".lock"), "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            try:
+                max_days = rotate_days(self.max_days, self.retention_days, self.redact)
+                rotate(self.path, self.archive_dir, self.max_bytes, max_days, today)
+                # Includes segments a crashed pass left behind
+                for segment in sorted(glob.glob(os.path.join(self.archive_dir, "records-*.csv"))):
+                    if os.path.exists(segment[:-len(".csv")] + ".json"):
+                        os.remove(segment)
+                    else:
+                        compact(segment, self.codec, self.redact, today)
+                enforce(self.archive_dir, self.retention_days, self.redact, today)
+                return True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# --- Dashboard ---
+class ArchivedDashboardStats:
+    """DashboardStats over the hot file plus every archived segment's summary.
+
+    Counts of a hot file that was just rotated are carried until its summary
+    appears, so the totals do not dip while the segment is being compacted.
+    """
+
+    eligible = DashboardStats.eligible
+    not_eligible = DashboardStats.not_eligible
+
+    def __init__(self, path=RECORDS_PATH, archive_dir=ARCHIVE_DIR, age_bin_edges=AGE_BIN_EDGES):
+        self.hot = DashboardStats(path, age_bin_edges)
+        self.archive_dir = archive_dir
+        self.age_bin_edges = self.hot.age_bin_edges
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._dir_mtime = None
+        # file id of a rotated hot file -> (total, results, age counts)
+        self._pending = {}
+        self._archived = (0, Counter(), np.zeros(len(self.age_bin_edges) - 1, dtype=np.int64))
+        self.version = 0
+        self._combine()
+
+    def refresh(self):
+        with self._lock:
+            hot = self.hot
+            file_id = hot._file_id
+            before = (hot.total, Counter(hot.results), hot.age_counts.copy())
+            changed = hot.refresh()
+            if file_id is not None and hot._file_id != file_id and before[0]:
+                self._pending[file_id] = before
+            changed |= self._load()
+            if changed:
+                self._combine()
+                self.version += 1
+            return changed
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.archive_dir).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        # Re-listed while a rotated file waits for its summary, in case both landed in one mtime tick
+        if mtime == self._dir_mtime and not self._pending:
+            return False
+        self._dir_mtime = mtime
+        total, results, age_counts = self._archived
+        changed = False
+        for path in _summaries(self.archive_dir):
+            name = os.path.basename(path)
+            if name in self._seen:
+                continue
+            try:
+                summary = _read_summary(path)
+            except (OSError, ValueError):
+                continue  # being replaced; picked up next time
+            self._seen.add(name)
+            total += summary["rows"]
+            results.update(summary["results"])
+            if summary["age_bin_edges"] == self.age_bin_edges.tolist():
+                age_counts = age_counts + np.asarray(summary["age_counts"], dtype=np.int64)
+            self._pending.pop(tuple(summary["source"]), None)
+            changed = True
+        self._archived = (total, results, age_counts)
+        return changed
+
+    @property
+    def archived_rows(self):
+        """Rows counted here that are no longer in the hot file."""
+        return self.total - self.hot.total
+
+    def _combine(self):
+        total, results, age_counts = self._archived
+        self.total = total + self.hot.total
+        self.results = results + self.hot.results
+        self.age_counts = age_counts + self.hot.age_counts
+        for rows, pending_results, pending_ages in self._pending.values():
+            self.total += rows
+            self.results.update(pending_results)
+            self.age_counts = self.age_counts + pending_ages
+
+
+if __name__ == "__main__":
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else RECORDS_PATH
+    archiver = Archiver(src, interval=0)
+    if not archiver.run_once():
+        sys.exit(f"another archiver is working on {archiver.archive_dir}")
+    segments = [_read_summary(p) for p in _summaries(archiver.archive_dir)]
+    print(f"{len(segments)} archived segments, {sum(s['rows'] for s in segments)} rows, in {archiver.archive_dir}/")
@@ -0,0 +1,363 @@
+# BloodReady | Hot-path Benchmark
+# Latency (p50/p95/p99) and throughput of the paths a submission touches,
+# at record counts from 1k to 1M, plus N donors driven through AppTest.
+#
+#   python benchmarks/hot_paths.py                          # 1k, 10k, 100k records
+#   python benchmarks/hot_paths.py --sizes 1000,1000000     # up to 1M rows
+#   python benchmarks/hot_paths.py --only eligibility,pdf   # a subset of paths
+#   python benchmarks/hot_paths.py --sessions 8             # concurrent AppTest donors
+#   python benchmarks/hot_paths.py --check                  # fail if p95 regressed vs baseline
+#   python benchmarks/hot_paths.py --update                 # record a new baseline
+#
+# Everything runs in a scratch directory; the repo's records and outbox
+# are never touched. Baselines are machine-specific: record them on the
+# box you compare on.
+
+import argparse
+import csv
+import json
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = os.path.join(ROOT, "app_clean_final.py")
+BASELINE = os.path.join(ROOT, "benchmarks", "hot_paths_baseline.json")
+PATHS = ("eligibility", "records", "dashboard", "pdf", "email", "sessions")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+YES_NO = ("yes", "no")
+GENDERS = ("female", "male", "other")
+
+
+# --- Measurement ---
+def timed(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples, ops=1):
+    """`ops` is the work done per sample (rows, messages) for throughput."""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "ops_s": round(ops * len(samples) / sum(samples), 1) if sum(samples) else None,
+    }
+
+
+# --- Synthetic Data ---
+def answers(rng):
+    gender = rng.choice(GENDERS)
+    return {
+        "age": rng.randint(10, 100), "weight": rng.randint(30, 150), "hb": round(rng.uniform(5, 20), 1),
+        "well": rng.choice(YES_NO), "meds": rng.choice(YES_NO), "tattoo": rng.choice(YES_NO),
+        "gender": gender,
+        "menstruating": rng.choice(YES_NO) if gender == "female" else "",
+        "pregnancy": rng.choice(YES_NO) if gender == "female" else "",
+        "donation_date": date.today() - timedelta(days=rng.randint(0, 400)),
+        "malaria_risk": rng.random() < 0.05,
+    }
+
+
+def record(rng, when):
+    a = answers(rng)
+    return {
+        "age": a["age"], "weight": a["weight"], "gender": a["gender"], "hb": a["hb"],
+        "well": a["well"], "meds": a["meds"], "travel": rng.choice(YES_NO),
+        "country": rng.choice(("", "", "India", "Philippines", "Korea")), "region": "",
+        "donation_date": str(a["donation_date"]), "tattoo": a["tattoo"],
+        "eligible": rng.choice(("eligible", "not_eligible")), "timestamp": str(when),
+    }
+
+
+def write_records(path, n, seed=0):
+    import pandas as pd
+    from record_store import RECORD_FIELDS
+
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(n, 1)
+    pd.DataFrame([record(rng, start + step * i) for i in range(n)], columns=RECORD_FIELDS).to_csv(path, index=False)
+
+
+def answer_columns(n, seed=0):
+    rng = random.Random(seed)
+    rows = [answers(rng) for _ in range(n)]
+    return {k: [r[k] for r in rows] for k in rows[0]}
+
+
+# --- Paths ---
+def bench_eligibility(sizes, **_):
+    from eligibility import check, evaluate
+
+    rng = random.Random(1)
+    forms = [answers(rng) for _ in range(200)]
+    it = iter(range(10**9))
+    out = {"check": summarize(timed(lambda: check(**forms[next(it) % len(forms)]), 2000))}
+    for n in sizes:
+        data = answer_columns(n)
+        out[f"evaluate@{n}"] = summarize(timed(lambda: evaluate(data), 5 if n >= 100_000 else 20), ops=n)
+    return out
+
+
+def bench_records(sizes, workdir, **_):
+    from record_store import RecordStore
+
+    rng = random.Random(2)
+    store = RecordStore(os.path.join(workdir, "append.csv"), flush_interval=0.05)
+    try:
+        enqueue = summarize(timed(lambda: store.append(record(rng, datetime.now())), 5000))
+
+        def durable_batch():
+            for _ in range(100):
+                store.append(record(rng, datetime.now()))
+            store.flush()
+        durable = summarize(timed(durable_batch, 30), ops=100)
+    finally:
+        store.close()
+    return {"append": enqueue, "append+flush@100": durable}
+
+
+def bench_dashboard(sizes, workdir, **_):
+    from dashboard_stats import DashboardStats
+    from records_index import RecordsIndex
+
+    out = {}
+    rng = random.Random(3)
+    for n in sizes:
+        path = os.path.join(workdir, f"records_{n}.csv")
+        write_records(path, n)
+        out[f"cold_refresh@{n}"] = summarize(timed(lambda: DashboardStats(path).refresh(), 3, warmup=0), ops=n)
+        out[f"index_build@{n}"] = summarize(timed(lambda: RecordsIndex(path).refresh(), 3, warmup=0), ops=n)
+
+        stats, index = DashboardStats(path), RecordsIndex(path)
+        stats.refresh()
+        index.refresh()
+
+        def tail_refresh():
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                csv.DictWriter(f, fieldnames=list(record(rng, datetime.now()))).writerow(record(rng, datetime.now()))
+            stats.refresh()
+            index.refresh()
+        out[f"incremental_refresh@{n}"] = summarize(timed(tail_refresh, 50))
+
+        filters = [{}, {"gender": "female"}, {"eligible": "eligible", "country": "india"}]
+        sorts = ["timestamp", "age", "hb"]
+        it = iter(range(10**9))
+
+        def page():
+            i = next(it)
+            index.query(equals=filters[i % 3], sort_by=sorts[i % 3], offset=(i % 5) * 50, limit=50)
+        out[f"records_page@{n}"] = summarize(timed(page, 60))
+        os.remove(path)
+    return out
+
+
+def bench_pdf(sizes, **_):
+    from report import ReportEngine
+
+    start = time.perf_counter()
+    engine = ReportEngine()
+    cold = time.perf_counter() - start
+    reports = [
+        {"age": 20 + i, "weight": 60, "hb": 13.0, "eligible": i % 2 == 0, "reasons": [] if i % 2 == 0 else ["Under 50 kg"],
+         "locale": ("en", "ko")[i % 2], "date": str(date.today())}
+        for i in range(20)
+    ]
+    it = iter(range(10**9))
+    out = {"engine_init": summarize([cold]), "render": summarize(timed(lambda: engine.render(reports[next(it) % 20]), 200))}
+    out["render_many@100"] = summarize(timed(lambda: engine.render_many(reports * 5), 5), ops=100)
+    return out
+
+
+class _SMTPStub(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib.send_message; accepts and drops every message."""
+
+    def handle(self):
+        self.wfile.write(b"220 stub ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].upper()
+            if verb == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.wfile.write(b"250 queued\r\n")
+            elif verb == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+def bench_email(sizes, workdir, **_):
+    from mailer import FAILED, SENT, Outbox, SMTPConfig
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = SMTPConfig(host="127.0.0.1", port=server.server_address[1], use_ssl=False, sender="bench@localhost", timeout=5)
+    outbox = Outbox(os.path.join(workdir, "outbox.db"), config=config, poll_interval=0.01)
+    pdf = b"%PDF-1.4 " + os.urandom(2048)
+    try:
+        enqueue = timed(lambda: outbox.send("donor@localhost", "Result", "Attached.", pdf), 200, warmup=0)
+
+        def delivered():
+            message_id = outbox.send("donor@localhost", "Result", "Attached.", pdf)
+            while outbox.status(message_id)[0] not in (SENT, FAILED):
+                time.sleep(0.0005)
+        return {"enqueue": summarize(enqueue), "send_to_delivered": summarize(timed(delivered, 100))}
+    finally:
+        outbox.close()
+        server.shutdown()
+
+
+def _donor(seed, rounds):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP, default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    submits = []
+    for _ in range(rounds):
+        at.slider[0].set_value(rng.randint(10, 100))
+        start = time.perf_counter()
+        at.button[0].click().run()
+        submits.append(time.perf_counter() - start)
+    return first, submits, bool(at.exception)
+
+
+def bench_sessions(sizes, workdir, sessions=4, rounds=3, **_):
+    # AppTest is not thread-safe (script compilation races), so each donor
+    # gets its own process; they share the records file in the scratch dir
+    start = time.perf_counter()
+    with ProcessPoolExecutor(sessions) as pool:
+        results = list(pool.map(_donor, range(sessions), [rounds] * sessions))
+    wall = time.perf_counter() - start
+    firsts = [r[0] for r in results]
+    submits = [s for r in results for s in r[1]]
+    out = {
+        f"first_paint@{sessions}": summarize(firsts),
+        f"submit@{sessions}": summarize(submits),
+    }
+    # Throughput over wall time, including process start-up
+    out[f"submit@{sessions}"]["ops_s"] = round(len(submits) / wall, 1)
+    out[f"submit@{sessions}"]["errors"] = sum(r[2] for r in results)
+    return out
+
+
+BENCHES = {
+    "eligibility": bench_eligibility,
+    "records": bench_records,
+    "dashboard": bench_dashboard,
+    "pdf": bench_pdf,
+    "email": bench_email,
+    "sessions": bench_sessions,
+}
+
+
+# --- Report ---
+def print_table(results):
+    print(f"{'path':<40}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>13}")
+    for path, metrics in results.items():
+        for name, m in metrics.items():
+            print(f"{path + '/' + name:<40}{m['n']:>6}{m['p50_ms']:>11.3f}{m['p95_ms']:>11.3f}{m['p99_ms']:>11.3f}{m['ops_s'] or 0:>13.1f}")
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for path, metrics in results.items():
+        for name, m in metrics.items():
+            base = baseline.get(path, {}).get(name)
+            if base is None:
+                continue
+            # Tiny timings are dominated by noise; give them a 0.05 ms floor
+            limit = max(base["p95_ms"], 0.05) * (1 + tolerance)
+            if m["p95_ms"] > limit:
+                failures.append(f"{path}/{name}: p95 {m['p95_ms']} ms exceeds baseline {base['p95_ms']} ms (+{tolerance:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path latency benchmark")
+    parser.add_argument("--only", default=",".join(PATHS), help=f"comma-separated subset of {', '.join(PATHS)}")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="record counts, e.g. 1000,1000000")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent AppTest donors")
+    parser.add_argument("--rounds", type=int, default=3, help="submits per AppTest donor")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed p95 slowdown vs baseline")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    selected = [p for p in args.only.split(",") if p]
+    unknown = set(selected) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(sorted(unknown))}")
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bloodready-bench-") as workdir:
+        # The app writes its records/outbox relative to the working directory
+        os.chdir(workdir)
+        try:
+            for path in selected:
+                print(f"running {path}...", file=sys.stderr)
+                results[path] = BENCHES[path](sizes, workdir=workdir, sessions=args.sessions, rounds=args.rounds)
+        finally:
+            os.chdir(cwd)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update:
+        baseline = {}
+        if os.path.exists(BASELINE):
+            with open(BASELINE, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {os.path.relpath(BASELINE, ROOT)}")
+        return 0
+
+    if args.check:
+        with open(BASELINE, encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# BloodReady | Import-time Benchmark
+# Measures what a cold start pays before the first paint: the top-level
+# imports of the app script, timed with `python -X importtime`.
+#
+#   python benchmarks/import_time.py            # print the profile
+#   python benchmarks/import_time.py --check    # fail if slower than the baseline
+#   python benchmarks/import_time.py --update   # record a new baseline
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app_clean_final.py")
+BASELINE = os.path.join(ROOT, "benchmarks", "import_time_baseline.json")
+# Modules that must never be imported at the top of the app script
+HEAVY = ("pandas", "matplotlib", "seaborn", "fpdf", "smtplib", "pyarrow")
+
+
+def top_level_imports(path=APP):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def profile(modules):
+    """Run one fresh interpreter; returns {module: cumulative microseconds}."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name[1:].rstrip()] = int(cumulative)
+    return timings
+
+
+def measure(modules, runs):
+    samples = [profile(modules) for _ in range(runs)]
+    # -X importtime nests children with two spaces; top-level entries have none
+    totals = [sum(us for name, us in s.items() if not name.startswith(" ")) for s in samples]
+    slowest = sorted(samples[-1].items(), key=lambda kv: -kv[1])[:15]
+    loaded = {name.strip() for name in samples[-1]}
+    return {
+        "modules": modules,
+        "total_ms": round(statistics.median(totals) / 1000, 1),
+        "slowest": [[name.strip(), round(us / 1000, 1)] for name, us in slowest],
+        "heavy_loaded": sorted(m for m in HEAVY if m in loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for app_clean_final.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    result = measure(top_level_imports(), args.runs)
+    print(f"Top-level imports: {', '.join(result['modules'])}")
+    print(f"Median import time: {result['total_ms']} ms over {args.runs} runs")
+    for name, ms in result["slowest"]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    if args.update:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Baseline written to {os.path.relpath(BASELINE, ROOT)}")
+        return 0
+
+    if args.check:
+        failures = []
+        if result["heavy_loaded"]:
+            failures.append(f"heavy modules imported at top level: {', '.join(result['heavy_loaded'])}")
+        with open(BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+        limit = baseline["total_ms"] * (1 + args.tolerance)
+        if result["total_ms"] > limit:
+            failures.append(f"{result['total_ms']} ms exceeds baseline {baseline['total_ms']} ms (+{args.tolerance:.0%})")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+# BloodReady | Bulk Pre-screening
+# Screens a whole registration list against the rule table: the upload is
+# read in chunks, its columns are matched to the form fields, and every chunk
+# is written straight back out with eligible / reasons / next-eligible columns.
+#
+#   python bulk_screen.py registrations.xlsx [screened.csv]
+
+import codecs
+import functools
+import glob
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from eligibility import get_rules
+from i18n import (ELIGIBLE, FEMALE, GENDERS, MALE, NO, NOT_ELIGIBLE, OTHER, UNKNOWN, YES, YES_NO_UNKNOWN,
+                  available_locales, get_catalog)
+from malaria_index import get_index
+
+CHUNK_ROWS = 10_000
+
+# Screened lists carry donor PII: files nobody downloaded are swept after an hour
+RESULT_PREFIX = "bloodready-screen-"
+RESULT_TTL = 3600
+SWEEP_INTERVAL = 600
+
+log = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = ("age", "weight", "hb")
+ANSWER_FIELDS = ("well", "meds", "tattoo", "menstruating", "pregnancy", "travel")
+DATE_FIELDS = ("donation_date", "tattoo_date", "travel_date", "birth_date")
+TEXT_FIELDS = ("country", "region")
+FIELDS = NUMERIC_FIELDS + ("gender",) + ANSWER_FIELDS + DATE_FIELDS + TEXT_FIELDS
+# Without these a row cannot be screened at all
+REQUIRED = ("age", "weight")
+
+# Headings seen in registration exports, on top of the field names and the form labels
+ALIASES = {
+    "age": ("나이", "연령", "만 나이"),
+    "weight": ("weight kg", "body weight", "체중", "몸무게"),
+    "hb": ("hemoglobin", "haemoglobin", "hgb", "혈색소", "헤모글로빈"),
+    "gender": ("sex", "성별"),
+    "well": ("feeling well", "healthy", "컨디션", "건강 상태"),
+    "meds": ("medication", "medications", "medicine", "복약", "약 복용", "복용 약물"),
+    "tattoo": ("piercing", "tattoo piercing", "문신", "문신 피어싱"),
+    "menstruating": ("period", "menstruation", "생리", "생리 중"),
+    "pregnancy": ("pregnant", "임신", "임신 출산"),
+    "donation_date": ("last donation", "last donation date", "최근 헌혈일", "마지막 헌혈일"),
+    "tattoo_date": ("tattoo date", "piercing date", "문신 날짜", "문신일"),
+    "travel_date": ("return date", "travel return date", "귀국일", "여행 날짜"),
+    "birth_date": ("delivery date", "childbirth date", "출산일"),
+    "travel": ("traveled", "travelled", "travel abroad", "해외여행", "해외 여행"),
+    "country": ("destination", "국가", "방문국"),
+    "region": ("city", "area", "지역", "방문지"),
+}
+
+# Spreadsheet answers ("Y", "TRUE", "네") to the i18n codes; the catalog labels are added below
+ANSWER_VALUES = {
+    "y": YES, "yes": YES, "true": YES, "1": YES, "o": YES, "예": YES, "네": YES,
+    "n": NO, "no": NO, "false": NO, "0": NO, "x": NO, "아니요": NO, "아니오": NO,
+    "unknown": UNKNOWN, "모름": UNKNOWN,
+}
+GENDER_VALUES = {
+    "f": FEMALE, "female": FEMALE, "woman": FEMALE, "여": FEMALE, "여성": FEMALE, "여자": FEMALE,
+    "m": MALE, "male": MALE, "man": MALE, "남": MALE, "남성": MALE, "남자": MALE,
+    "other": OTHER, "기타": OTHER,
+}
+
+
+def _norm(text):
+    return re.sub(r"[\W_]+", " ", str(text)).strip().casefold()
+
+
+@functools.lru_cache(maxsize=None)
+def _value_maps():
+    maps = []
+    for values, codes in ((ANSWER_VALUES, YES_NO_UNKNOWN), (GENDER_VALUES, GENDERS)):
+        merged = dict(values)
+        for locale in available_locales():
+            for code in codes:
+                merged.setdefault(_norm(get_catalog(locale).option(code)), code)
+        maps.append(merged)
+    return maps
+
+
+# --- Column Matching ---
+def field_label(t, field):
+    """Form label for a field; the event dates have no form widget of their own."""
+    key = f"form.{field}"
+    return t(key) if key in t.messages else t(f"bulk.field.{field}")
+
+
+def match_columns(columns):
+    """{field: column} for the headings that name a form field, first match wins."""
+    lookup = {}
+    for field in FIELDS:
+        names = [field, *ALIASES.get(field, ())]
+        names += [field_label(get_catalog(locale), field) for locale in available_locales()]
+        for name in names:
+            lookup.setdefault(_norm(name), field)
+    mapping = {}
+    for column in columns:
+        field = lookup.get(_norm(column))
+        if field is not None and field not in mapping:
+            mapping[field] = column
+    return mapping
+
+
+# --- Reading ---
+def _encoding(file):
+    # Korean Excel saves CSV as CP949 unless told otherwise
+    head = file.read(1 << 16)
+    file.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+def _csv_chunks(file, chunk_rows):
+    reader = pd.read_csv(
+        file, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+        encoding=_encoding(file), skipinitialspace=True,
+    )
+    with reader:
+        yield from reader
+
+
+def _xlsx_chunks(file, chunk_rows):
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building the workbook in memory
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"column_{i + 1}" if c is None else str(c).strip() for i, c in enumerate(header)]
+        batch = []
+        for row in rows:
+            if any(v is not None for v in row):
+                batch.append(row[:len(columns)])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=columns, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(file, name, chunk_rows=CHUNK_ROWS):
+    """DataFrames of at most `chunk_rows` rows from a CSV or XLSX upload."""
+    file.seek(0)
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        return _xlsx_chunks(file, chunk_rows)
+    return _csv_chunks(file, chunk_rows)
+
+
+def read_columns(file, name):
+    chunks = iter_chunks(file, name, chunk_rows=1)
+    try:
+        first = next(chunks, None)
+    finally:
+        chunks.close()
+        file.seek(0)
+    return [] if first is None else list(first.columns)
+
+
+# --- Screening ---
+def _text(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def _codes(series, values):
+    # Each distinct answer is resolved once and broadcast back over the rows
+    codes, uniques = pd.factorize(_text(series))
+    table = np.array([values.get(_norm(v), v) for v in uniques], dtype=object)
+    return table[codes]
+
+
+def _dates(series):
+    codes, uniques = pd.factorize(_text(series))
+    # "2025. 3. 1." and "2025/03/01" as well as ISO dates and Excel date cells
+    cleaned = [re.sub(r"\s*[./]\s*", "-", v).strip("-") for v in uniques]
+    parsed = pd.to_datetime(pd.Series(cleaned, dtype=object), errors="coerce", format="mixed")
+    table = np.append(parsed.to_numpy(dtype="datetime64[D]"), np.datetime64("NaT", "D"))
+    return table[codes]
+
+
+def _malaria_risk(countries, regions, travel):
+    index = get_index()
+    codes, uniques = pd.factorize(pd.Series([f"{c}\x1f{r}" for c, r in zip(countries, regions)]))
+    table = np.array([index.match(*key.split("\x1f")) is not None for key in uniques] + [False])
+    # A destination only counts when the donor did not answer "no" to traveling
+    return table[codes] & (travel != NO)
+
+
+def screen_chunk(chunk, mapping, t, rules=None, today=None):
+    """(copy of `chunk` with the output columns filled in, number of eligible rows)."""
+    rules = rules or get_rules()
+    today = today or date.today()
+    n = len(chunk)
+    answers, genders = _value_maps()
+
+    data = {}
+    for field in NUMERIC_FIELDS:
+        column = mapping.get(field)
+        data[field] = np.full(n, np.nan) if column is None else pd.to_numeric(chunk[column], errors="coerce").to_numpy(float)
+    for field in ANSWER_FIELDS + ("gender",):
+        column = mapping.get(field)
+        data[field] = np.full(n, "", dtype=object) if column is None else _codes(chunk[column], genders if field == "gender" else answers)
+    for field in DATE_FIELDS:
+        column = mapping.get(field)
+        data[field] = np.full(n, np.datetime64("NaT", "D")) if column is None else _dates(chunk[column])
+    text = {f: _text(chunk[mapping[f]]).tolist() if f in mapping else [""] * n for f in TEXT_FIELDS}
+    data["malaria_risk"] = _malaria_risk(text["country"], text["region"], data["travel"])
+
+    eligible, masks = rules.evaluate(data, today=today)
+    expiry = rules.expiry_dates(data, masks, today)
+    next_dates = rules.next_eligible(data, masks, today, expiry)
+
+    reasons = np.full(n, "", dtype=object)
+
+    def add(active, piece):
+        joined = reasons[active]
+        reasons[active] = np.where(joined == "", piece, joined + "; " + piece)
+
+    missing = np.zeros(n, dtype=bool)
+    for field in REQUIRED:
+        absent = np.isnan(data[field])
+        if absent.any():
+            add(absent, t("bulk.missing", field=field_label(t, field)))
+        missing |= absent
+    for rule in rules.rules:
+        active = (masks & rule.bit) != 0
+        if not active.any():
+            continue
+        label = rule.text.get(t.locale, rule.text["en"])
+        dated = active & ~np.isnat(expiry[rule.bit]) if rule.bit in expiry else np.zeros(n, dtype=bool)
+        if dated.any():
+            until = np.datetime_as_string(expiry[rule.bit][dated]).astype(object)
+            add(dated, label + " (~" + until + ")")
+        if (active & ~dated).any():
+            add(active & ~dated, label)
+
+    eligible &= ~missing
+    next_out = np.datetime_as_string(next_dates).astype(object)
+    next_out[np.isnat(next_dates) | eligible | missing] = ""
+    out = chunk.copy()
+    out["eligible"] = np.where(eligible, t.option(ELIGIBLE), t.option(NOT_ELIGIBLE))
+    out["reasons"] = reasons
+    out["next_eligible_date"] = next_out
+    return out, int(eligible.sum())
+
+
+def screen(file, name, mapping, out, locale="en", today=None, chunk_rows=CHUNK_ROWS):
+    """Screen every row of an upload into the text file `out`, one chunk at a time.
+
+    Yields (rows screened so far, eligible so far) after each chunk.
+    """
+    t = get_catalog(locale)
+    rules = get_rules()
+    today = today or date.today()
+    rows = eligible = 0
+    for chunk in iter_chunks(file, name, chunk_rows):
+        annotated, passed = screen_chunk(chunk, mapping, t, rules, today)
+        annotated.to_csv(out, header=rows == 0, index=False)
+        rows += len(annotated)
+        eligible += passed
+        yield rows, eligible
+
+
+# --- Result Files ---
+def result_file():
+    """(fd, path) of a new temporary file for a screened list."""
+    return tempfile.mkstemp(prefix=RESULT_PREFIX, suffix=".csv")
+
+
+def sweep_results(max_age=RESULT_TTL, now=None):
+    """Delete screened files older than `max_age` seconds; returns how many."""
+    now = time.time() if now is None else now
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{RESULT_PREFIX}*.csv")):
+        try:
+            if now - os.stat(path).st_mtime > max_age:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:  # another process swept it first
+            pass
+    return removed
+
+
+def start_sweeper(interval=SWEEP_INTERVAL, max_age=RESULT_TTL):
+    """Sweep now (files a previous process left behind) and then every `interval` seconds."""
+    def run():
+        while True:
+            try:
+                sweep_results(max_age)
+            except OSError:
+                log.exception("Failed to sweep screened files")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="screen-result-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python bulk_screen.py registrations.csv|xlsx [screened.csv]")
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else re.sub(r"\.\w+$", "", src) + "_screened.csv"
+    with open(src, "rb") as f, open(dst, "w", newline="", encoding="utf-8-sig") as out:
+        mapping = match_columns(read_columns(f, src))
+        missing = [field for field in REQUIRED if field not in mapping]
+        if missing:
+            sys.exit(f"{src}: no column for {', '.join(missing)}")
+        for rows, eligible in screen(f, src, mapping, out):
+            pass
+    print(f"Screened {rows} rows ({eligible} eligible) into {dst}")
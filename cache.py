@@ -0,0 +1,115 @@
+# BloodReady | Shared Cache
+# Byte cache for rendered artifacts (the result PDF) behind one get/set
+# interface, so replicas behind a load balancer can share what any of them
+# rendered. The backend comes from BLOODREADY_CACHE:
+#
+#   (unset)                     per-process LRU, the single-replica default
+#   sqlite:////var/lib/cache.db shared by every process on one host
+#                               (sqlite:///cache.db is relative to the working directory)
+#   redis://host:6379/0         shared across hosts (needs the redis package)
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+CACHE_URL = os.environ.get("BLOODREADY_CACHE", "")
+MAX_ENTRIES = 256
+# Long enough to cover re-downloads of a session's result
+TTL_SECONDS = 24 * 3600
+
+
+def cache_key(namespace, value):
+    """Stable key for a JSON-serializable value (the same on every replica)."""
+    digest = hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class MemoryCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=TTL_SECONDS):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class SQLiteCache:
+    """WAL-mode table shared by processes on the host; expired rows are
+    ignored on read and swept on a fraction of writes."""
+
+    SWEEP_EVERY = 100
+
+    def __init__(self, path, max_entries=MAX_ENTRIES * 16):
+        self.path = path
+        self.max_entries = max_entries
+        self._writes = 0
+        with closing(self._db()) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key):
+        with closing(self._db()) as db:
+            row = db.execute("SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key, value, ttl=TTL_SECONDS):
+        now = time.time()
+        with closing(self._db()) as db:
+            db.execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl))
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                # Past the size cap, the entries closest to expiry go first
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+
+class RedisCache:
+    """SET with EX: Redis expires the entries; configure maxmemory-policy for the size cap."""
+
+    def __init__(self, url, prefix="bloodready:cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=TTL_SECONDS):
+        self.client.set(self.prefix + key, value, ex=int(ttl))
+
+
+def open_cache(url=CACHE_URL):
+    if not url:
+        return MemoryCache()
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    raise ValueError(f"unsupported BLOODREADY_CACHE {url!r}")
@@ -0,0 +1,388 @@
+# BloodReady | Columnar Record Store (optional, needs pyarrow)
+# Eligibility records as Parquet files partitioned by submission day, with
+# dictionary-encoded answers and native date/timestamp columns. Each group
+# commit adds a small part file; compaction periodically merges a day's small
+# parts into one file.
+
+import json
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from dashboard_stats import CsvTail, DashboardStats
+from record_store import RecordStore
+from records_index import FILTER_COLUMNS, _key
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: compaction runs unlocked
+    fcntl = None
+
+PARQUET_ROOT = "eligibility_records"
+# A day is compacted once it holds this many parts smaller than COMPACT_BYTES
+COMPACT_MIN_FILES = 16
+COMPACT_BYTES = 8 << 20
+COMPACT_INTERVAL = 60.0
+# Footer key listing the files a compacted part replaces
+SOURCES_KEY = b"bloodready.sources"
+
+log = logging.getLogger(__name__)
+
+_category = pa.dictionary(pa.int8(), pa.string())
+SCHEMA = pa.schema([
+    ("age", pa.int16()),
+    ("weight", pa.int16()),
+    ("gender", _category),
+    ("hb", pa.float32()),
+    ("well", _category),
+    ("meds", _category),
+    ("travel", _category),
+    ("country", pa.string()),
+    ("region", pa.string()),
+    ("donation_date", pa.date32()),
+    ("tattoo", _category),
+    ("eligible", _category),
+    ("timestamp", pa.timestamp("us")),
+])
+PARTITIONING = ds.partitioning(pa.schema([("day", pa.date32())]), flavor="hive")
+
+
+def to_table(df):
+    """Convert CSV-shaped records (all text dates) to the columnar schema."""
+    df = df.reindex(columns=SCHEMA.names)
+    for name in ("age", "weight", "hb"):
+        df[name] = pd.to_numeric(df[name], errors="coerce")
+    df["donation_date"] = pd.to_datetime(df["donation_date"], errors="coerce").dt.date
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    for name in ("country", "region"):
+        df[name] = df[name].fillna("").astype(str)
+    table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False, safe=False)
+    day = pc.cast(table["timestamp"], pa.date32())
+    return table.append_column("day", day)
+
+
+def write_table(table, root=PARQUET_ROOT):
+    ds.write_dataset(
+        table, root, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+
+
+def dataset(root=PARQUET_ROOT, files=None):
+    """The dataset under `root`, or over just `files` (still partitioned by day)."""
+    schema = SCHEMA.append(pa.field("day", pa.date32()))
+    if files is not None:
+        return ds.dataset(files, format="parquet", schema=schema, partitioning=PARTITIONING, partition_base_dir=root)
+    return ds.dataset(root, format="parquet", schema=schema, partitioning=PARTITIONING)
+
+
+def read(root=PARQUET_ROOT, columns=None, start=None, end=None):
+    """Load only `columns` from the day partitions in [start, end]."""
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or SCHEMA.names)
+    flt = None
+    if start is not None:
+        flt = ds.field("day") >= pa.scalar(start, pa.date32())
+    if end is not None:
+        upper = ds.field("day") <= pa.scalar(end, pa.date32())
+        flt = upper if flt is None else flt & upper
+    return dataset(root).to_table(columns=columns or SCHEMA.names, filter=flt).to_pandas()
+
+
+# --- Compaction ---
+@lru_cache(maxsize=4096)
+def _sources(path):
+    """Names of the parts a compacted file replaces (compacted files never change)."""
+    metadata = pq.read_schema(path).metadata or {}
+    return frozenset(json.loads(metadata.get(SOURCES_KEY, b"[]")))
+
+
+def _partitions(root):
+    return sorted(e.path for e in os.scandir(root) if e.is_dir() and e.name.startswith("day="))
+
+
+def _parts(partition):
+    """(live part paths, replaced part paths) of one day partition.
+
+    A compacted file is written before the parts it merged are removed, so
+    parts listed in a compacted file's footer are skipped while they linger.
+    """
+    names = [n for n in os.listdir(partition) if n.endswith(".parquet") and not n.startswith((".", "_"))]
+    replaced = set()
+    for name in names:
+        if name.startswith("compact-"):
+            try:
+                replaced |= _sources(os.path.join(partition, name))
+            except FileNotFoundError:
+                pass
+    live = sorted(os.path.join(partition, n) for n in names if n not in replaced)
+    return live, sorted(os.path.join(partition, n) for n in names if n in replaced)
+
+
+def compact_partition(partition, min_files=COMPACT_MIN_FILES, max_bytes=COMPACT_BYTES):
+    """Merge a day's small parts into one file; returns the number of parts merged."""
+    live, replaced = _parts(partition)
+    for path in replaced:  # left behind by a pass that stopped before removing them
+        os.remove(path)
+    small = [f for f in live if os.path.getsize(f) < max_bytes]
+    if len(small) < min_files:
+        return 0
+    table = ds.dataset(small, format="parquet", schema=SCHEMA).to_table()
+    sources = json.dumps([os.path.basename(f) for f in small]).encode()
+    table = table.replace_schema_metadata({SOURCES_KEY: sources})
+    name = f"compact-{uuid.uuid4().hex}.parquet"
+    tmp = os.path.join(partition, "." + name)
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, os.path.join(partition, name))
+    for path in small:
+        os.remove(path)
+    return len(small)
+
+
+def compact(root=PARQUET_ROOT, min_files=COMPACT_MIN_FILES, max_bytes=COMPACT_BYTES):
+    """Compact every day partition; a pass already running elsewhere is skipped."""
+    if not os.path.isdir(root):
+        return 0
+    with open(os.path.join(root, ".compact.lock"), "a") as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+        try:
+            return sum(compact_partition(p, min_files, max_bytes) for p in _partitions(root))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class ParquetRecordStore(RecordStore):
+    """RecordStore whose group commits land as new Parquet part files,
+    compacted every `compact_interval` seconds."""
+
+    def __init__(self, root=PARQUET_ROOT, flush_interval=0.5, max_batch=1000, compact_interval=COMPACT_INTERVAL):
+        self.compact_interval = compact_interval
+        self._compacted = time.monotonic()
+        super().__init__(path=root, flush_interval=flush_interval, max_batch=max_batch)
+
+    def _commit(self, records):
+        write_table(to_table(pd.DataFrame(records)), self.path)
+        if time.monotonic() - self._compacted >= self.compact_interval:
+            self._compacted = time.monotonic()
+            try:
+                compact(self.path)
+            except Exception:
+                # The records are committed; the next pass tries again
+                log.exception("Compacting %s failed", self.path)
+
+
+# --- Readers ---
+class ParquetTail(CsvTail):
+    """Follows a Parquet root one day partition at a time; subclasses fold in new rows.
+
+    Only partitions whose directory changed are listed again, and only their
+    new parts are read. Each partition keeps its own aggregate, so when
+    compaction has replaced parts already folded in, that day is taken out
+    and read again from its compacted file.
+    """
+
+    columns_read = ()
+
+    def _reset(self):
+        super()._reset()
+        # partition path -> [directory mtime, folded parts, aggregate]
+        self._days = {}
+
+    def _refresh(self):
+        if not os.path.isdir(self.path):
+            changed = bool(self._days)
+            self._reset()
+            return changed
+        changed = False
+        partitions = set(_partitions(self.path))
+        for partition in set(self._days) - partitions:
+            self._apply(self._days.pop(partition)[2], -1)
+            changed = True
+        for partition in sorted(partitions):
+            mtime = os.stat(partition).st_mtime_ns
+            day = self._days.get(partition)
+            if day is not None and day[0] == mtime:
+                continue
+            live, _ = _parts(partition)
+            # A directory changed within the last second may still change in the same mtime tick
+            stable = mtime if time.time_ns() - mtime > 1_000_000_000 else None
+            if day is None:
+                day = self._days[partition] = [stable, frozenset(), self._empty()]
+            files = frozenset(live)
+            if files == day[1]:
+                day[0] = stable
+                continue
+            self._apply(day[2], -1)
+            if not day[1] <= files:
+                day[1], day[2] = frozenset(), self._empty()
+            new = sorted(files - day[1])
+            try:
+                self._ingest_table(day[2], ds.dataset(new, format="parquet", schema=SCHEMA).to_table(columns=list(self.columns_read)))
+            except FileNotFoundError:
+                # Compacted away while listing: read the partition again next time
+                day[0], day[1], day[2] = None, frozenset(), self._empty()
+                changed = True
+                continue
+            day[0], day[1] = stable, files
+            self._apply(day[2], +1)
+            changed = True
+        return changed
+
+    def _files(self):
+        return [f for day in self._days.values() for f in sorted(day[1])]
+
+    def _empty(self):
+        raise NotImplementedError
+
+    def _ingest_table(self, aggregate, table):
+        raise NotImplementedError
+
+    def _apply(self, aggregate, sign):
+        raise NotImplementedError
+
+
+class ParquetDashboardStats(ParquetTail, DashboardStats):
+    """DashboardStats over a Parquet root."""
+
+    columns_read = ("age", "eligible")
+
+    def _empty(self):
+        return {"total": 0, "results": Counter(), "ages": np.zeros(len(self.age_bin_edges) - 1, dtype=np.int64)}
+
+    def _ingest_table(self, aggregate, table):
+        aggregate["total"] += table.num_rows
+        for label, count in table["eligible"].to_pandas().value_counts().items():
+            aggregate["results"][str(label)] += int(count)
+        counts, _ = np.histogram(table["age"].to_numpy(zero_copy_only=False), bins=self.age_bin_edges)
+        aggregate["ages"] += counts
+
+    def _apply(self, aggregate, sign):
+        self.total += sign * aggregate["total"]
+        for label, count in aggregate["results"].items():
+            self.results[label] += sign * count
+        self.age_counts += sign * aggregate["ages"]
+
+
+class ParquetRecordsIndex(ParquetTail):
+    """RecordsIndex counterpart: day partitions prune the date range, the
+    remaining filters are pushed down into the Parquet scan, and the filter
+    choices are counted as parts arrive."""
+
+    columns_read = FILTER_COLUMNS
+
+    def _reset(self):
+        super()._reset()
+        self._counts = {name: Counter() for name in FILTER_COLUMNS}
+        self._labels = {name: {} for name in FILTER_COLUMNS}
+
+    def _empty(self):
+        return {name: Counter() for name in FILTER_COLUMNS}
+
+    def _ingest_table(self, aggregate, table):
+        for name in FILTER_COLUMNS:
+            values = table[name].to_pandas().astype(str).str.strip()
+            for label, count in values.value_counts().items():
+                aggregate[name][label] += int(count)
+
+    def _apply(self, aggregate, sign):
+        for name, counts in aggregate.items():
+            for label, count in counts.items():
+                key = _key(name, label)
+                self._counts[name][key] += sign * count
+                self._labels[name].setdefault(key, label)
+
+    def distinct(self, column):
+        """{key: label} for a filter column, most frequent first."""
+        with self._lock:
+            counts = self._counts[column]
+            return {k: self._labels[column][k] for k, n in counts.most_common() if n > 0}
+
+    def query(self, start=None, end=None, equals=None, sort_by="timestamp", descending=True, offset=0, limit=50):
+        """Return (matching row count, DataFrame of one page).
+
+        Only the sort column is scanned in full; the page is picked from it
+        with a top-k selection and just those rows are read.
+        """
+        with self._lock:
+            while True:
+                try:
+                    return self._query(start, end, equals or {}, sort_by, descending, offset, limit)
+                except FileNotFoundError:
+                    # Compaction replaced parts after the last refresh
+                    if self._refresh():
+                        self.version += 1
+
+    def _query(self, start, end, equals, sort_by, descending, offset, limit):
+        files = self._files()
+        if not files:
+            return 0, pd.DataFrame(columns=SCHEMA.names)
+        flt = None
+        if start is not None:
+            flt = ds.field("day") >= pa.scalar(start, pa.date32())
+        if end is not None:
+            upper = ds.field("day") <= pa.scalar(end, pa.date32())
+            flt = upper if flt is None else flt & upper
+        for column, value in equals.items():
+            field = pc.utf8_trim_whitespace(ds.field(column).cast(pa.string()))
+            if column == "country":
+                cond = pc.utf8_lower(field) == value.strip().casefold()
+            else:
+                cond = field == value.strip()
+            flt = cond if flt is None else flt & cond
+        data = dataset(self.path, files)
+        keys = data.to_table(columns=[sort_by], filter=flt)[sort_by]
+        total = len(keys)
+        k = min(offset + limit, total)
+        if offset >= k:
+            return total, pd.DataFrame(columns=SCHEMA.names)
+        order = "descending" if descending else "ascending"
+        top = pc.select_k_unstable(keys, k, sort_keys=[("key", order)])
+        # The selection breaks ties at the k-th value arbitrarily; take every row
+        # tied with it so ties keep scan order, as a full sort_by would
+        cutoff = keys.take(top[-1:])[0]
+        if cutoff.is_valid and not (pa.types.is_floating(keys.type) and cutoff.as_py() != cutoff.as_py()):
+            top = pc.indices_nonzero((pc.greater_equal if descending else pc.less_equal)(keys, cutoff).fill_null(False))
+        else:
+            top = pa.array(range(total), pa.uint64())
+        ranked = pa.table({"key": keys.take(top), "row": top}).sort_by([("key", order), ("row", "ascending")])
+        rows = data.take(ranked["row"].slice(offset, limit), columns=SCHEMA.names, filter=flt)
+        return total, rows.to_pandas()
+
+
+def migrate_csv(csv_path, root=PARQUET_ROOT, chunksize=100_000):
+    """One-shot migration of an eligibility_records.csv into the Parquet layout."""
+    rows = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str, keep_default_na=False):
+        write_table(to_table(chunk), root)
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["compact"]:
+        root = sys.argv[2] if len(sys.argv) > 2 else PARQUET_ROOT
+        print(f"Merged {compact(root, min_files=2)} part files under {root}/")
+        sys.exit()
+    src = sys.argv[1] if len(sys.argv) > 1 else "eligibility_records.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else PARQUET_ROOT
+    print(f"Migrated {migrate_csv(src, dst)} rows from {src} to {dst}/")
+    compact(dst, min_files=2)
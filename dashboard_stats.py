@@ -0,0 +1,121 @@
+# BloodReady | Incremental Dashboard Aggregates
+# Keeps running counters for the records file and only parses the bytes
+# appended since the last refresh.
+
+import csv
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+# Matches the age slider range (10-100) split into 20 bins
+AGE_BIN_EDGES = np.linspace(10, 100, 21)
+
+# New records hold the i18n codes; older ones the display labels
+ELIGIBLE_LABELS = {"eligible", "Eligible", "적합함"}
+NOT_ELIGIBLE_LABELS = {"not_eligible", "Not Eligible", "부적합함"}
+
+
+class CsvTail:
+    """Follows an append-only CSV by byte offset; subclasses fold in new rows."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Bumped on every change so renderers can cache on it
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self.columns = None
+        self._offset = 0
+        self._file_id = None
+
+    def refresh(self):
+        """Fold in rows appended since the last call; returns True if anything changed."""
+        with self._lock:
+            changed = self._refresh()
+            if changed:
+                self.version += 1
+            return changed
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            changed = self._file_id is not None
+            self._reset()
+            return changed
+        file_id = (stat.st_dev, stat.st_ino)
+        # A different inode or a shorter file means the file was rotated or truncated
+        rotated = file_id != self._file_id or stat.st_size < self._offset
+        if rotated:
+            self._reset()
+            self._file_id = file_id
+        if stat.st_size == self._offset:
+            return rotated
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(stat.st_size - self._offset)
+        # Only consume complete lines; a partially flushed row is picked up next time
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return rotated
+        base = self._offset
+        self._offset += end
+        lines = chunk[:end].split(b"\n")[:-1]
+        offsets = []
+        for line in lines:
+            offsets.append(base)
+            base += len(line) + 1
+        if self.columns is None:
+            header = next(csv.reader([lines[0].decode("utf-8")]))
+            self.columns = {name: i for i, name in enumerate(header)}
+            lines, offsets = lines[1:], offsets[1:]
+        # The record store never writes embedded newlines, so one line is one row
+        rows = csv.reader(line.decode("utf-8") for line in lines)
+        self._ingest(rows, offsets)
+        return True
+
+    def _ingest(self, rows, offsets):
+        raise NotImplementedError
+
+
+class DashboardStats(CsvTail):
+    def __init__(self, path, age_bin_edges=AGE_BIN_EDGES):
+        self.age_bin_edges = np.asarray(age_bin_edges, dtype=float)
+        super().__init__(path)
+
+    def _reset(self):
+        super()._reset()
+        self.total = 0
+        self.results = Counter()
+        self.age_counts = np.zeros(len(self.age_bin_edges) - 1, dtype=np.int64)
+
+    @property
+    def eligible(self):
+        return sum(self.results[label] for label in ELIGIBLE_LABELS)
+
+    @property
+    def not_eligible(self):
+        return sum(self.results[label] for label in NOT_ELIGIBLE_LABELS)
+
+    def _ingest(self, rows, offsets):
+        age_col = self.columns.get("age")
+        result_col = self.columns.get("eligible")
+        ages = []
+        for row in rows:
+            if not row:
+                continue
+            self.total += 1
+            if result_col is not None and result_col < len(row):
+                self.results[row[result_col]] += 1
+            if age_col is not None and age_col < len(row):
+                try:
+                    ages.append(float(row[age_col]))
+                except ValueError:
+                    pass
+        if ages:
+            counts, _ = np.histogram(ages, bins=self.age_bin_edges)
+            self.age_counts += counts
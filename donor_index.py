@@ -0,0 +1,236 @@
+# BloodReady | Donor History
+# Opt-in donor identity: an email or phone number is reduced to a keyed hash
+# and never stored. Each check is added to the donor's history, and the
+# donor's next eligible date is kept in an indexed column, so "who becomes
+# eligible next week" is a B-tree range scan, not a pass over every donor.
+# The app records and shows history only once the contact is verified.
+#
+#   BLOODREADY_DONOR_SALT=<random secret>   required; history is off without it
+#   python donor_index.py [start YYYY-MM-DD] [days]
+
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+DONORS_PATH = "donors.db"
+# Set per deployment: phone numbers are few enough to brute-force an unkeyed
+# hash, and a key shipped with the code is no key at all
+DONOR_SALT = os.environ.get("BLOODREADY_DONOR_SALT", "")
+# Used when the rule table has no recent_donation rule
+DONATION_INTERVAL_DAYS = 56
+HISTORY_LIMIT = 20
+CODE_TTL = 600
+CODE_ATTEMPTS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    donor TEXT NOT NULL,
+    day TEXT NOT NULL,
+    donation_date TEXT,
+    eligible INTEGER NOT NULL,
+    mask INTEGER NOT NULL,
+    next_eligible TEXT
+);
+CREATE INDEX IF NOT EXISTS visits_donor ON visits (donor, id);
+CREATE TABLE IF NOT EXISTS donors (
+    donor TEXT PRIMARY KEY,
+    first_visit TEXT NOT NULL,
+    last_visit TEXT NOT NULL,
+    visits INTEGER NOT NULL,
+    last_donation TEXT,
+    next_eligible TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS donors_next ON donors (next_eligible);
+"""
+DONOR_FIELDS = ["donor", "first_visit", "last_visit", "visits", "last_donation", "next_eligible"]
+VISIT_FIELDS = ["day", "donation_date", "eligible", "mask", "next_eligible"]
+
+
+# --- Donor Key ---
+def _contact(text):
+    text = (text or "").strip()
+    if "@" in text:
+        return text.casefold()
+    digits = re.sub(r"\D", "", text)
+    # "+82 10-1234-5678" and "010-1234-5678" are the same phone
+    if digits.startswith("82") and len(digits) >= 11:
+        digits = "0" + digits[2:]
+    return digits if len(digits) >= 7 else ""
+
+
+def enabled(salt=DONOR_SALT):
+    return bool(salt)
+
+
+def donor_key(contact, salt=DONOR_SALT):
+    """Keyed hash of a normalized email or phone number; None if it is neither."""
+    if not salt:
+        raise ValueError("donor history needs BLOODREADY_DONOR_SALT")
+    normalized = _contact(contact)
+    if not normalized:
+        return None
+    return hmac.new(salt.encode(), normalized.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+# --- Verification ---
+# Anyone can type someone else's contact, so history is recorded and shown
+# only after a one-time code mailed to it is entered. Phone numbers cannot be
+# verified here, so they get no history.
+def verifiable(contact):
+    return "@" in _contact(contact)
+
+
+@dataclass
+class Challenge:
+    donor: str
+    digest: str
+    expires: float
+    attempts: int = 0
+
+    @classmethod
+    def issue(cls, donor, ttl=CODE_TTL):
+        """(challenge, six-digit code to send); only the code's hash is kept."""
+        code = f"{secrets.randbelow(10 ** 6):06d}"
+        return cls(donor, cls._digest(donor, code), time.time() + ttl), code
+
+    @staticmethod
+    def _digest(donor, code):
+        return hashlib.sha256(f"{donor}:{code}".encode()).hexdigest()
+
+    @property
+    def spent(self):
+        return self.attempts >= CODE_ATTEMPTS or time.time() > self.expires
+
+    def check(self, code):
+        if self.spent:
+            return False
+        self.attempts += 1
+        return hmac.compare_digest(self.digest, self._digest(self.donor, code.strip()))
+
+
+def donation_interval(rules=None):
+    """Days between whole-blood donations, from the recent_donation rule."""
+    from eligibility import get_rules
+
+    for rule in (rules or get_rules()).rules:
+        if rule.id == "recent_donation" and rule.waiting_days:
+            return rule.waiting_days
+    return DONATION_INTERVAL_DAYS
+
+
+def _day(value):
+    return None if value is None else date.fromisoformat(value)
+
+
+# --- Index ---
+class DonorIndex:
+    def __init__(self, path=DONORS_PATH):
+        self.path = path
+        with closing(self._db()) as db:
+            db.executescript(SCHEMA)
+
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def record(self, donor, day, donation_date, eligible, mask, next_eligible, interval=None):
+        """Add a check to the donor's history and return the updated donor.
+
+        `next_eligible` is the check's own result (None for a deferral with no
+        fixed end). The donor's date is the later of that and the interval
+        after the most recent donation any visit reported.
+        """
+        interval = interval or donation_interval()
+        if donation_date is not None:
+            donation_date = min(donation_date, day)
+        with closing(self._db()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT last_donation FROM donors WHERE donor = ?", (donor,)).fetchone()
+            known = _day(row[0]) if row else None
+            reported = [d for d in (known, donation_date) if d is not None]
+            last_donation = max(reported) if reported else None
+            donor_next = next_eligible
+            if donor_next is not None and last_donation is not None:
+                donor_next = max(donor_next, last_donation + timedelta(days=interval))
+            db.execute(
+                "INSERT INTO visits (donor, day, donation_date, eligible, mask, next_eligible) VALUES (?, ?, ?, ?, ?, ?)",
+                (donor, day.isoformat(), donation_date and donation_date.isoformat(), int(eligible), int(mask),
+                 next_eligible and next_eligible.isoformat()),
+            )
+            db.execute(
+                "INSERT INTO donors (donor, first_visit, last_visit, visits, last_donation, next_eligible) "
+                "VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (donor) DO UPDATE SET "
+                "last_visit = excluded.last_visit, visits = visits + 1, "
+                "last_donation = excluded.last_donation, next_eligible = excluded.next_eligible",
+                (donor, day.isoformat(), day.isoformat(), last_donation and last_donation.isoformat(),
+                 donor_next and donor_next.isoformat()),
+            )
+            db.execute("COMMIT")
+        return self.donor(donor)
+
+    def donor(self, donor):
+        """{field: value} for a returning donor, dates as date objects; None if unknown."""
+        with closing(self._db()) as db:
+            row = db.execute(f"SELECT {', '.join(DONOR_FIELDS)} FROM donors WHERE donor = ?", (donor,)).fetchone()
+        if row is None:
+            return None
+        found = dict(zip(DONOR_FIELDS, row))
+        for field in ("first_visit", "last_visit", "last_donation", "next_eligible"):
+            found[field] = _day(found[field])
+        return found
+
+    def history(self, donor, limit=HISTORY_LIMIT):
+        """The donor's most recent checks, newest first."""
+        with closing(self._db()) as db:
+            rows = db.execute(
+                f"SELECT {', '.join(VISIT_FIELDS)} FROM visits WHERE donor = ? ORDER BY id DESC LIMIT ?",
+                (donor, limit),
+            ).fetchall()
+        return [dict(zip(VISIT_FIELDS, row)) for row in rows]
+
+    def any(self):
+        with closing(self._db()) as db:
+            return db.execute("SELECT 1 FROM donors LIMIT 1").fetchone() is not None
+
+    # --- Drive Planning ---
+    # Both read a contiguous run of the donors_next index
+    def becoming_eligible(self, start, end, offset=0, limit=50):
+        """(total, [donor rows]) whose next eligible date falls in [start, end], soonest first."""
+        params = (start.isoformat(), end.isoformat())
+        with closing(self._db()) as db:
+            (total,) = db.execute("SELECT COUNT(*) FROM donors WHERE next_eligible BETWEEN ? AND ?", params).fetchone()
+            rows = db.execute(
+                f"SELECT {', '.join(DONOR_FIELDS)} FROM donors WHERE next_eligible BETWEEN ? AND ? "
+                "ORDER BY next_eligible LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return total, [dict(zip(DONOR_FIELDS, row)) for row in rows]
+
+    def forecast(self, start, end):
+        """[(day, donors)] for each day in [start, end] on which someone becomes eligible."""
+        with closing(self._db()) as db:
+            return db.execute(
+                "SELECT next_eligible, COUNT(*) FROM donors WHERE next_eligible BETWEEN ? AND ? GROUP BY next_eligible",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+
+
+if __name__ == "__main__":
+    import sys
+
+    start = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today() + timedelta(days=1)
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    end = start + timedelta(days=days - 1)
+    counts = DonorIndex().forecast(start, end)
+    for day, n in counts:
+        print(f"{day}  {n}")
+    print(f"{sum(n for _, n in counts)} donors become eligible {start} – {end}")
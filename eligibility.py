@@ -0,0 +1,370 @@
+# BloodReady | Eligibility Engine
+# Vectorized rules shared by the Streamlit form and batch pre-screening.
+# Criteria live in data/eligibility_rules.json and are compiled per field:
+# thresholds into one breakpoint table, answers into per-value bitmasks.
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+
+RULES_PATH = os.environ.get(
+    "BLOODREADY_RULES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "eligibility_rules.json"),
+)
+
+# --- Reason Bits ---
+UNDER_16 = 1 << 0
+UNDER_50KG = 1 << 1
+NOT_WELL = 1 << 2
+LOW_HB = 1 << 3
+ON_MEDS = 1 << 4
+MALARIA_RISK = 1 << 5
+MENSTRUATING = 1 << 6
+PREGNANT = 1 << 7
+RECENT_DONATION = 1 << 8
+TATTOO = 1 << 9
+
+# Built-in rule ids keep their bits across reloads; new ids take the next free bit
+RULE_BITS = {
+    "under_16": UNDER_16,
+    "under_50kg": UNDER_50KG,
+    "not_well": NOT_WELL,
+    "low_hb": LOW_HB,
+    "on_meds": ON_MEDS,
+    "malaria_risk": MALARIA_RISK,
+    "menstruating": MENSTRUATING,
+    "pregnant": PREGNANT,
+    "recent_donation": RECENT_DONATION,
+    "tattoo": TATTOO,
+}
+MASK_DTYPE = np.uint32
+
+NUMERIC_OPS = {
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    # Applied to the days elapsed since a date field
+    "within_days": np.less,
+}
+
+
+# --- Answer Helpers ---
+# Answers are the i18n codes ("yes", "female", ...); older records hold the
+# display strings ("예 / Yes"), which the predicates still accept. Each field is
+# resolved once per distinct value and the bits are broadcast over the rows.
+def _lookup(values, n, bits_for):
+    if values is None:
+        return np.zeros(n, dtype=MASK_DTYPE)
+    if np.ndim(values) == 0:
+        return np.full(n, bits_for(str(values)), dtype=MASK_DTYPE)
+    if isinstance(values, list) and len(values) <= 64:
+        # The single-donor form and small API batches; skips importing pandas for these
+        return np.array([0 if v is None else bits_for(str(v)) for v in values], dtype=MASK_DTYPE)
+    import pandas as pd
+
+    if isinstance(values, list):
+        values = np.array(values, dtype=object)
+    codes, uniques = pd.factorize(values)
+    table = np.array([bits_for(str(v)) for v in uniques] + [0], dtype=MASK_DTYPE)
+    return table[codes]
+
+
+def _yes(v):
+    return v == "yes" or "예" in v or v == "Yes"
+
+
+def _no(v):
+    return v == "no" or "아니요" in v or v == "No"
+
+
+def _true(v):
+    return v in ("True", "true", "1") or _yes(v)
+
+
+def _gender(v):
+    if v in ("female", "male"):
+        return v
+    if "여성" in v or v == "Female":
+        return "female"
+    if "남성" in v or v == "Male":
+        return "male"
+    return "other"
+
+
+ANSWER_OPS = {"yes": _yes, "no": _no, "true": _true}
+
+
+def _dates(values, n):
+    dates = np.asarray(values)
+    if dates.ndim == 0:
+        dates = np.full(n, dates.item())
+    return dates.astype("datetime64[D]")
+
+
+def _numbers(values, n):
+    return np.broadcast_to(np.asarray(values, dtype=float), n)
+
+
+# --- Compiled Rules ---
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    bit: int
+    field: str
+    op: str
+    text: dict
+    value: float = None
+    genders: tuple = None
+    blocking: bool = True
+    waiting_days: int = None
+    since: str = None
+    # Without the `since` date the deferral has no fixed end (rather than
+    # counting the wait from today)
+    needs_since: bool = False
+
+
+class _Thresholds:
+    """Every numeric rule on one field folded into a single breakpoint table.
+
+    Region 2i lies strictly between points[i-1] and points[i], region 2i+1
+    is points[i] itself; one searchsorted gives the bits of all rules.
+    """
+
+    def __init__(self, rules):
+        self.points = np.unique([float(r.value) for r in rules])
+        k = len(self.points)
+        probes = []
+        for i in range(k + 1):
+            if i == 0:
+                probes.append(self.points[0] - 1)
+            elif i == k:
+                probes.append(self.points[-1] + 1)
+            else:
+                probes.append((self.points[i - 1] + self.points[i]) / 2)
+            if i < k:
+                probes.append(self.points[i])
+        probes = np.array(probes)
+        self.table = np.zeros(len(probes), dtype=MASK_DTYPE)
+        for rule in rules:
+            self.table[NUMERIC_OPS[rule.op](probes, rule.value)] |= rule.bit
+
+    def __call__(self, x):
+        i = np.searchsorted(self.points, x, side="left")
+        exact = self.points[np.minimum(i, len(self.points) - 1)] == x
+        bits = self.table[np.minimum(2 * i + exact, len(self.table) - 1)]
+        return np.where(np.isnan(x), 0, bits).astype(MASK_DTYPE)
+
+
+class RuleSet:
+    def __init__(self, spec):
+        self.version = spec.get("version", "")
+        self.rules = []
+        next_bit = max(RULE_BITS.values()) << 1
+        for raw in spec["rules"]:
+            bit = RULE_BITS.get(raw["id"])
+            if bit is None:
+                bit, next_bit = next_bit, next_bit << 1
+            if raw["op"] not in NUMERIC_OPS and raw["op"] not in ANSWER_OPS:
+                raise ValueError(f"unknown op {raw['op']!r} in rule {raw['id']!r}")
+            genders = raw.get("genders")
+            self.rules.append(Rule(
+                id=raw["id"], bit=bit, field=raw["field"], op=raw["op"], text=raw["text"],
+                value=raw.get("value"), genders=tuple(genders) if genders else None,
+                blocking=raw.get("blocking", True), waiting_days=raw.get("waiting_days"), since=raw.get("since"),
+                needs_since=raw.get("needs_since", False),
+            ))
+        if next_bit > np.iinfo(MASK_DTYPE).max:
+            raise ValueError("too many eligibility rules for the reason mask")
+
+        # (bit, Korean, English) in the order reasons are shown to the donor
+        self.reasons = [(r.bit, r.text.get("ko", r.text["en"]), r.text["en"]) for r in self.rules]
+        self.blocking = sum(r.bit for r in self.rules if r.blocking)
+
+        # Cost per row scales with the number of fields, not the number of rules
+        by_field = {}
+        for rule in self.rules:
+            by_field.setdefault(rule.field, []).append(rule)
+        self._numeric = {}
+        self._answers = {}
+        for field, rules in by_field.items():
+            numeric = [r for r in rules if r.op in NUMERIC_OPS]
+            if numeric:
+                self._numeric[field] = _Thresholds(numeric)
+            answers = [(ANSWER_OPS[r.op], r.bit) for r in rules if r.op in ANSWER_OPS]
+            if answers:
+                self._answers[field] = self._answer_bits(answers)
+        self._dated = {r.field for r in self.rules if r.op == "within_days"}
+
+        restricted = sum(r.bit for r in self.rules if r.genders)
+        allowed = {g: ~restricted & 0xFFFFFFFF for g in ("female", "male", "other")}
+        for rule in self.rules:
+            for gender in rule.genders or ():
+                allowed[gender] |= rule.bit
+        self._gender_bits = lambda v: allowed[_gender(v)]
+        self._restricted = restricted
+
+    @staticmethod
+    def _answer_bits(answers):
+        memo = {}
+
+        def bits_for(v):
+            bits = memo.get(v)
+            if bits is None:
+                bits = memo[v] = sum(bit for test, bit in answers if test(v))
+            return bits
+        return bits_for
+
+    def evaluate(self, data, today=None):
+        today = today or date.today()
+        n = len(np.atleast_1d(data["age"]))
+        mask = np.zeros(n, dtype=MASK_DTYPE)
+        for field, thresholds in self._numeric.items():
+            if field not in data:
+                continue
+            if field in self._dated:
+                dates = _dates(data[field], n)
+                days = (np.datetime64(today, "D") - dates).astype(float)
+                values = np.where(np.isnat(dates), np.nan, days)
+            else:
+                values = _numbers(data[field], n)
+            mask |= thresholds(values)
+        for field, bits_for in self._answers.items():
+            if field in data:
+                mask |= _lookup(data[field], n, bits_for)
+        if self._restricted:
+            # Gender-specific rules only count for the genders they list
+            mask &= _lookup(data["gender"] if "gender" in data else None, n, self._gender_bits) | ~MASK_DTYPE(self._restricted)
+        return (mask & self.blocking) == 0, mask
+
+    def expiry_dates(self, data, mask, today=None):
+        """{bit: datetime64[D] array} of when each timed deferral ends (NaT where inactive).
+
+        Rules no row triggered are left out.
+
+        Without a recorded event date (e.g. tattoo_date) the waiting period
+        is counted from today, so the date is the latest it could be, if
+        the event is already over. Rules with `needs_since` (pregnancy,
+        counted from birth_date) stay NaT instead: no fixed end.
+        """
+        today = np.datetime64(today or date.today(), "D")
+        n = len(mask)
+        out = {}
+        for rule in self.rules:
+            active = (mask & rule.bit) != 0
+            if rule.waiting_days is None or not active.any():
+                continue
+            if rule.since and rule.since in data:
+                anchor = _dates(data[rule.since], n)
+            elif rule.op == "within_days" and rule.field in data:
+                anchor = _dates(data[rule.field], n)
+            else:
+                anchor = np.full(n, np.datetime64("NaT", "D"))
+            if not rule.needs_since:
+                anchor = np.where(np.isnat(anchor), today, anchor)
+            out[rule.bit] = np.where(active, anchor + np.timedelta64(rule.waiting_days, "D"), np.datetime64("NaT", "D"))
+        return out
+
+    def next_eligible(self, data, mask, today=None, expiry=None):
+        """Earliest date every blocking deferral has ended; NaT if one has no fixed end."""
+        today = np.datetime64(today or date.today(), "D")
+        if expiry is None:
+            expiry = self.expiry_dates(data, mask, today)
+        result = np.full(len(mask), today)
+        open_ended = np.zeros(len(mask), dtype=bool)
+        for rule in self.rules:
+            if not rule.blocking:
+                continue
+            active = (mask & rule.bit) != 0
+            if rule.bit in expiry:
+                ends = expiry[rule.bit]
+                result = np.maximum(result, np.where(active, ends, today))
+                open_ended |= active & np.isnat(ends)
+            else:
+                open_ended |= active
+        result[open_ended] = np.datetime64("NaT", "D")
+        return result
+
+    def labels(self, mask, locale="en", until=None):
+        until = until or {}
+        labels = []
+        for rule in self.rules:
+            if mask & rule.bit:
+                text = rule.text.get(locale, rule.text["en"])
+                labels.append(f"{text} (~{until[rule.bit]})" if rule.bit in until else text)
+        return labels
+
+
+# --- Loading ---
+_compiled = {}
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return RuleSet(json.load(f))
+
+
+def get_rules(path=RULES_PATH):
+    """Compiled rule set, recompiled when the file changes on disk.
+
+    Updating the criteria is an edit to the JSON file; the next check
+    picks it up without a restart.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _compiled.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _compiled[path] = (mtime, load_rules(path))
+    return cached[1]
+
+
+# Snapshot of the default rules for callers that need the vocabulary up front
+REASONS = get_rules().reasons
+# Menstruation is reported to the donor but does not block donation
+BLOCKING = get_rules().blocking
+
+
+# --- Engine ---
+def evaluate(data, today=None, rules=None):
+    """Run every rule over all rows at once.
+
+    `data` is a DataFrame or a dict of equal-length arrays with the
+    form fields (age, weight, hb, well, meds, tattoo, gender,
+    menstruating, pregnancy, donation_date, malaria_risk).
+    Returns (eligible bool array, reason bitmask array).
+    """
+    return (rules or get_rules()).evaluate(data, today=today)
+
+
+def next_eligible(data, mask, today=None, rules=None):
+    return (rules or get_rules()).next_eligible(data, mask, today=today)
+
+
+def _row(answers):
+    if isinstance(answers.get("donation_date"), datetime):
+        answers["donation_date"] = answers["donation_date"].date()
+    return {k: [v] for k, v in answers.items()}
+
+
+def check(today=None, **answers):
+    """Single-donor wrapper around `evaluate` for the interactive form."""
+    eligible, mask = evaluate(_row(answers), today=today)
+    return bool(eligible[0]), int(mask[0])
+
+
+def deferral_dates(mask, today=None, **answers):
+    """Single-donor form: ({bit: end date} per timed deferral, next eligible date or None)."""
+    rules = get_rules()
+    row = _row(answers)
+    masks = np.array([mask], dtype=MASK_DTYPE)
+    expiry = rules.expiry_dates(row, masks, today)
+    ends = {bit: d[0].item() for bit, d in expiry.items() if not np.isnat(d[0])}
+    until = rules.next_eligible(row, masks, today, expiry)[0]
+    return ends, None if np.isnat(until) else until.item()
+
+
+def reason_labels(mask, locale="en", until=None):
+    """Localized reasons; `until` ({bit: date}) appends when each deferral ends."""
+    return get_rules().labels(mask, locale, until)
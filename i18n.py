@@ -0,0 +1,61 @@
+# BloodReady | Message Catalog
+# UI strings per locale, loaded once and flattened to dotted keys. Answers
+# are stored and evaluated as the language-independent codes below; the
+# catalog only turns them into labels for display.
+
+import functools
+import json
+import os
+
+LOCALES_DIR = os.environ.get(
+    "BLOODREADY_LOCALES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "locales"),
+)
+DEFAULT_LOCALE = "en"
+
+# --- Answer Codes ---
+YES, NO, UNKNOWN = "yes", "no", "unknown"
+FEMALE, MALE, OTHER = "female", "male", "other"
+ELIGIBLE, NOT_ELIGIBLE = "eligible", "not_eligible"
+
+YES_NO = (YES, NO)
+YES_NO_UNKNOWN = (YES, NO, UNKNOWN)
+GENDERS = (FEMALE, MALE, OTHER)
+
+
+def _flatten(tree, prefix=""):
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+class Catalog:
+    def __init__(self, locale, messages):
+        self.locale = locale
+        self.messages = messages
+
+    def __call__(self, key, **params):
+        """Message for `key`, formatted with `params`; the key itself if missing."""
+        text = self.messages.get(key, key)
+        return text.format(**params) if params else text
+
+    def option(self, code):
+        return self.messages.get(f"option.{code}", code)
+
+
+@functools.lru_cache(maxsize=None)
+def available_locales():
+    return tuple(sorted(name[:-5] for name in os.listdir(LOCALES_DIR) if name.endswith(".json")))
+
+
+@functools.lru_cache(maxsize=None)
+def get_catalog(locale=DEFAULT_LOCALE):
+    """Catalog for `locale`; keys it lacks fall back to the default locale."""
+    messages = {} if locale == DEFAULT_LOCALE else dict(get_catalog(DEFAULT_LOCALE).messages)
+    with open(os.path.join(LOCALES_DIR, f"{locale}.json"), encoding="utf-8") as f:
+        messages.update(_flatten(json.load(f)))
+    return Catalog(locale, messages)
@@ -0,0 +1,170 @@
+# BloodReady | Iron Food Database
+# Food composition table (iron and heme iron in mg per 100 g, one typical
+# portion each) compiled once into a word-prefix search index. The bundled
+# table holds rounded USDA FoodData Central values for common foods; heme
+# iron is estimated as 40% of the iron in meat, poultry and fish.
+#
+#   python iron_foods.py import-fdc <FoodData Central CSV dir> [out.csv]
+
+import bisect
+import csv
+import functools
+import os
+from dataclasses import dataclass
+
+from malaria_index import normalize
+
+FOODS_PATH = os.environ.get(
+    "BLOODREADY_FOODS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "iron_foods.csv"),
+)
+FIELDS = ["name", "ko", "group", "portion", "grams", "iron", "heme"]
+RESULTS = 20
+# Share of iron in the heme form for animal flesh (Monsen's estimate)
+HEME_SHARE = 0.4
+
+
+@dataclass(frozen=True)
+class Food:
+    id: int
+    name: str
+    ko: str
+    group: str
+    portion: str
+    grams: float
+    iron: float
+    heme: float
+
+    def intake(self, portions=1.0):
+        """(total iron, heme iron) in mg for `portions` of the typical portion."""
+        grams = self.grams * portions
+        return self.iron * grams / 100, self.heme * grams / 100
+
+
+def _tokens(text):
+    words = normalize(text).split()
+    tokens = set(words)
+    # Hangul compounds: "간" should find "닭간" and "돼지 간" alike
+    for word in words:
+        if not word.isascii():
+            tokens.update(word[i:] for i in range(1, len(word)))
+    return tokens
+
+
+# --- Index ---
+class FoodIndex:
+    """Sorted vocabulary of name tokens; a prefix is one bisect to a contiguous
+    run of tokens whose postings are merged, and query words are intersected."""
+
+    def __init__(self, foods):
+        self.foods = foods
+        postings = {}
+        for food in foods:
+            for token in _tokens(food.name) | _tokens(food.ko):
+                postings.setdefault(token, []).append(food.id)
+        self._vocab = sorted(postings)
+        self._postings = [postings[token] for token in self._vocab]
+        self._names = [normalize(food.name) for food in foods]
+
+    def __len__(self):
+        return len(self.foods)
+
+    def _prefix(self, prefix):
+        lo = bisect.bisect_left(self._vocab, prefix)
+        hi = bisect.bisect_left(self._vocab, prefix + "\U0010ffff", lo)
+        ids = set()
+        for posting in self._postings[lo:hi]:
+            ids.update(posting)
+        return ids
+
+    def search(self, query, limit=RESULTS):
+        """Foods whose English or Korean name has a word starting with every query word."""
+        words = normalize(query).split()
+        if not words:
+            return []
+        ids = None
+        for word in sorted(words, key=len, reverse=True):
+            found = self._prefix(word)
+            ids = found if ids is None else ids & found
+            if not ids:
+                return []
+        first = words[0]
+        # Names that start with the query first, then the shortest (least specific) names
+        ranked = sorted(ids, key=lambda i: (not self._names[i].startswith(first), len(self._names[i]), i))
+        return [self.foods[i] for i in ranked[:limit]]
+
+    def richest(self, limit=RESULTS):
+        """Most iron per typical portion; the suggestions before anything is typed."""
+        return sorted(self.foods, key=lambda f: -f.intake()[0])[:limit]
+
+    def label(self, food, is_kr=False):
+        name = f"{food.ko} / {food.name}" if is_kr and food.ko else food.name
+        return f"{name} — {food.portion}"
+
+
+def load_foods(path=FOODS_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            Food(i, row["name"], row.get("ko") or "", row.get("group") or "", row["portion"],
+                 float(row["grams"]), float(row["iron"]), float(row.get("heme") or 0))
+            for i, row in enumerate(csv.DictReader(f))
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def get_foods(path=FOODS_PATH):
+    """Compiled once per process and path."""
+    return FoodIndex(load_foods(path))
+
+
+# --- FoodData Central Import ---
+IRON_NUTRIENT_IDS = {"1089", "303"}  # FDC id and legacy SR number for "Iron, Fe"
+HEME_CATEGORIES = (
+    "beef", "pork", "lamb", "veal", "game", "poultry", "finfish", "shellfish", "sausages", "luncheon",
+)
+
+
+def import_fdc(fdc_dir, out_path=FOODS_PATH):
+    """Build the foods table from a FoodData Central CSV release (SR Legacy or Foundation).
+
+    Reads food.csv, food_category.csv, food_nutrient.csv and food_portion.csv;
+    food_nutrient.csv is streamed, so the full release fits in little memory.
+    """
+    def rows(name):
+        with open(os.path.join(fdc_dir, name), newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    categories = {row["id"]: row["description"] for row in rows("food_category.csv")}
+    iron = {}
+    for row in rows("food_nutrient.csv"):
+        if row["nutrient_id"] in IRON_NUTRIENT_IDS and row["amount"]:
+            iron[row["fdc_id"]] = float(row["amount"])
+    portions = {}
+    for row in rows("food_portion.csv"):
+        if row["fdc_id"] in iron and row["fdc_id"] not in portions and row["gram_weight"]:
+            amount = row.get("amount") or "1"
+            unit = row.get("modifier") or row.get("portion_description") or "portion"
+            portions[row["fdc_id"]] = (f"{float(amount):g} {unit}", float(row["gram_weight"]))
+    count = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(FIELDS)
+        for row in rows("food.csv"):
+            fdc_id = row["fdc_id"]
+            if fdc_id not in iron:
+                continue
+            group = categories.get(row.get("food_category_id"), "")
+            portion, grams = portions.get(fdc_id, ("100 g", 100.0))
+            heme = iron[fdc_id] * HEME_SHARE if any(c in group.casefold() for c in HEME_CATEGORIES) else 0
+            writer.writerow([row["description"], "", group, portion, f"{grams:g}", f"{iron[fdc_id]:g}", f"{heme:.2f}"])
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "import-fdc":
+        sys.exit("usage: python iron_foods.py import-fdc <FoodData Central CSV dir> [out.csv]")
+    dst = sys.argv[3] if len(sys.argv) > 3 else FOODS_PATH
+    print(f"Wrote {import_fdc(sys.argv[2], dst)} foods to {dst}")
@@ -0,0 +1,135 @@
+# BloodReady | Iron Intake Log
+# Per-user food entries in SQLite. A daily totals table is updated in the
+# same transaction as every entry added or removed, so today's total and the
+# rolling 7-day figures read at most a week of rows however long the history.
+# Guest logs (users keyed "guest-...") only last a browser session and are
+# purged once idle for GUEST_TTL seconds.
+
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import timedelta
+
+IRON_LOG_PATH = "iron_log.db"
+WINDOW_DAYS = 7
+GUEST_PREFIX = "guest-"
+GUEST_TTL = 86400
+SWEEP_INTERVAL = 3600
+
+log = logging.getLogger(__name__)
+
+
+class IronLog:
+    def __init__(self, path=IRON_LOG_PATH):
+        self.path = path
+        with closing(self._db()) as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    user TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    food TEXT NOT NULL,
+                    portion TEXT NOT NULL,
+                    portions REAL NOT NULL,
+                    iron REAL NOT NULL,
+                    heme REAL NOT NULL,
+                    created REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_user_day ON entries (user, day);
+                CREATE TABLE IF NOT EXISTS daily (
+                    user TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    iron REAL NOT NULL,
+                    heme REAL NOT NULL,
+                    PRIMARY KEY (user, day)
+                ) WITHOUT ROWID;
+            """)
+
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def add(self, user, day, food, portions=1.0):
+        """Log `portions` of a Food on `day`; returns the entry id."""
+        iron, heme = food.intake(portions)
+        with closing(self._db()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            cur = db.execute(
+                "INSERT INTO entries (user, day, food, portion, portions, iron, heme, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user, day.isoformat(), food.name, food.portion, portions, iron, heme, time.time()),
+            )
+            db.execute(
+                "INSERT INTO daily (user, day, iron, heme) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user, day) DO UPDATE SET iron = iron + excluded.iron, heme = heme + excluded.heme",
+                (user, day.isoformat(), iron, heme),
+            )
+            db.execute("COMMIT")
+        return cur.lastrowid
+
+    def remove(self, user, entry_id):
+        with closing(self._db()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT day, iron, heme FROM entries WHERE id = ? AND user = ?", (entry_id, user)).fetchone()
+            if row:
+                db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                db.execute(
+                    "UPDATE daily SET iron = max(iron - ?, 0), heme = max(heme - ?, 0) WHERE user = ? AND day = ?",
+                    (row[1], row[2], user, row[0]),
+                )
+            db.execute("COMMIT")
+
+    def entries(self, user, day):
+        """[(id, food, portion, portions, iron, heme)] logged on `day`, oldest first."""
+        with closing(self._db()) as db:
+            return db.execute(
+                "SELECT id, food, portion, portions, iron, heme FROM entries WHERE user = ? AND day = ? ORDER BY id",
+                (user, day.isoformat()),
+            ).fetchall()
+
+    def summary(self, user, today, days=WINDOW_DAYS):
+        """{"today": (iron, heme), "window": (iron, heme), "days_logged": n} from the daily totals."""
+        start = today - timedelta(days=days - 1)
+        with closing(self._db()) as db:
+            rows = db.execute(
+                "SELECT day, iron, heme FROM daily WHERE user = ? AND day BETWEEN ? AND ?",
+                (user, start.isoformat(), today.isoformat()),
+            ).fetchall()
+        totals = {day: (iron, heme) for day, iron, heme in rows}
+        return {
+            "today": totals.get(today.isoformat(), (0.0, 0.0)),
+            "window": (sum(t[0] for t in totals.values()), sum(t[1] for t in totals.values())),
+            "days_logged": len(totals),
+        }
+
+    def purge_guests(self, max_age=GUEST_TTL, now=None):
+        """Delete guest logs with no entry added in `max_age` seconds; returns how many."""
+        now = time.time() if now is None else now
+        guests = GUEST_PREFIX + "*"
+        with closing(self._db()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            stale = [row[0] for row in db.execute(
+                "SELECT user FROM entries WHERE user GLOB ? GROUP BY user HAVING MAX(created) < ?",
+                (guests, now - max_age),
+            )]
+            db.executemany("DELETE FROM entries WHERE user = ?", [(user,) for user in stale])
+            # Includes totals whose entries were all removed
+            db.execute("DELETE FROM daily WHERE user GLOB ? AND user NOT IN (SELECT user FROM entries)", (guests,))
+            db.execute("COMMIT")
+        return len(stale)
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL, max_age=GUEST_TTL):
+        """Purge idle guest logs now and then every `interval` seconds."""
+        def run():
+            while True:
+                try:
+                    self.purge_guests(max_age)
+                except sqlite3.Error:
+                    log.exception("Failed to purge guest iron logs")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="iron-guest-sweeper", daemon=True)
+        thread.start()
+        return thread
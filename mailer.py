@@ -0,0 +1,239 @@
+# BloodReady | Background Email Delivery
+# Messages go into a SQLite outbox; a small worker pool delivers them over
+# reused SMTP connections and retries failures with exponential backoff.
+
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+from metrics import count, span
+
+OUTBOX_PATH = "outbox.db"
+
+QUEUED, SENDING, SENT, FAILED = "queued", "sending", "sent", "failed"
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class SMTPConfig:
+    host: str = "smtp.gmail.com"
+    port: int = 465
+    user: str = ""
+    password: str = ""
+    use_ssl: bool = True
+    sender: str = "your_email@example.com"
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            host=env("BLOODREADY_SMTP_HOST", cls.host),
+            port=int(env("BLOODREADY_SMTP_PORT", cls.port)),
+            user=env("BLOODREADY_SMTP_USER", cls.user),
+            password=env("BLOODREADY_SMTP_PASSWORD", cls.password),
+            use_ssl=env("BLOODREADY_SMTP_SSL", "1") not in ("0", "false", "no"),
+            sender=env("BLOODREADY_SMTP_FROM", cls.sender),
+        )
+
+
+def build_message(sender, to_email, subject, body, pdf_bytes=None):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg.set_content(body)
+    if pdf_bytes is not None:
+        msg.add_attachment(pdf_bytes, maintype='application', subtype='pdf', filename='blood_eligibility_summary.pdf')
+    return msg
+
+
+class _Connection:
+    """One authenticated SMTP session kept open across messages."""
+
+    def __init__(self, config, idle_timeout):
+        self.config = config
+        self.idle_timeout = idle_timeout
+        self._smtp = None
+        self._last_used = 0.0
+
+    def send(self, msg):
+        self.close_if_idle()
+        reused = self._smtp is not None
+        if not reused:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            if not reused:
+                raise
+            # Server dropped the pooled session: reconnect once before counting a failure
+            self.close()
+            self._smtp = self._connect()
+            self._smtp.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def _connect(self):
+        cfg = self.config
+        cls = smtplib.SMTP_SSL if cfg.use_ssl else smtplib.SMTP
+        smtp = cls(cfg.host, cfg.port, timeout=cfg.timeout)
+        if cfg.user:
+            smtp.login(cfg.user, cfg.password)
+        return smtp
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+
+
+class Outbox:
+    def __init__(self, path=OUTBOX_PATH, config=None, workers=2, max_attempts=5,
+                 backoff=2.0, poll_interval=0.5, idle_timeout=60.0, claim_timeout=300.0):
+        self.path = path
+        self.config = config or SMTPConfig.from_env()
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.claim_timeout = claim_timeout
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        with closing(self._db()) as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload BLOB NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                error TEXT
+            )""")
+            db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+        self._threads = [
+            threading.Thread(target=self._work, name=f"outbox-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def send(self, to_email, subject, body, pdf_bytes=None):
+        """Queue a message and return its id; delivery happens in the background."""
+        msg = build_message(self.config.sender, to_email, subject, body, pdf_bytes)
+        with closing(self._db()) as db:
+            cur = db.execute(
+                "INSERT INTO outbox (payload, status, next_attempt) VALUES (?, ?, ?)",
+                (msg.as_bytes(), QUEUED, time.time()),
+            )
+        self._wake.set()
+        return cur.lastrowid
+
+    def status(self, message_id):
+        """Return (status, last error) without blocking on delivery."""
+        with closing(self._db()) as db:
+            row = db.execute("SELECT status, error FROM outbox WHERE id = ?", (message_id,)).fetchone()
+        return row if row else (None, None)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join()
+
+    # --- Workers ---
+    def _claim(self, db):
+        # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same row.
+        # A claim is a lease: next_attempt becomes its expiry, and a message still
+        # "sending" past it (its worker or process died) is claimed again by any
+        # worker sharing the outbox, while live workers' claims are left alone.
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT id, payload, attempts FROM outbox WHERE status IN (?, ?) AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT 1",
+                (QUEUED, SENDING, now),
+            ).fetchone()
+            if row:
+                db.execute(
+                    "UPDATE outbox SET status = ?, next_attempt = ? WHERE id = ?",
+                    (SENDING, now + self.claim_timeout, row[0]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        return row
+
+    def _work(self):
+        conn = _Connection(self.config, self.idle_timeout)
+        db = self._db()
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    row = self._claim(db)
+                except Exception:
+                    # A locked or unreadable outbox: keep the worker and back off
+                    failures += 1
+                    log.exception("Claiming from outbox %s failed", self.path)
+                    self._stop.wait(min(self.backoff * 2 ** (failures - 1), 60.0))
+                    continue
+                failures = 0
+                if row is None:
+                    conn.close_if_idle()
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                message_id, payload, attempts = row
+                try:
+                    with span("email_deliver"):
+                        conn.send(message_from_bytes(payload, policy=policy.default))
+                except Exception as e:
+                    attempts += 1
+                    conn.close()
+                    if attempts >= self.max_attempts:
+                        status, delay = FAILED, 0
+                        count("emails_failed")
+                    else:
+                        status, delay = QUEUED, self.backoff * 2 ** (attempts - 1)
+                    log.warning("Email %s attempt %d failed: %s", message_id, attempts, e)
+                    update = (
+                        "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, error = ? WHERE id = ?",
+                        (status, attempts, time.time() + delay, str(e), message_id),
+                    )
+                else:
+                    count("emails_sent")
+                    update = (
+                        "UPDATE outbox SET status = ?, attempts = ?, error = NULL, payload = x'' WHERE id = ?",
+                        (SENT, attempts + 1, message_id),
+                    )
+                try:
+                    db.execute(*update)
+                except Exception:
+                    # The claim's lease runs out and the message is picked up again
+                    log.exception("Recording the status of email %s failed", message_id)
+        finally:
+            conn.close()
+            db.close()
@@ -0,0 +1,223 @@
+# BloodReady | Malaria Risk Geography
+# Risk-area dataset compiled once into a normalized index: exact alias lookup
+# for countries, an Aho-Corasick automaton per country for free-text regions
+# and a prefix trie for autocomplete. Every lookup is linear in the input.
+
+import functools
+import json
+import os
+import unicodedata
+
+MALARIA_AREAS_PATH = os.environ.get(
+    "BLOODREADY_MALARIA_AREAS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "malaria_areas.json"),
+)
+COMPLETIONS = 16
+
+
+def normalize(text):
+    """NFKC + casefold, punctuation folded to single spaces."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+# Administrative-unit endings a Hangul place name may carry ("강화" + "군")
+HANGUL_SUFFIXES = ("시", "군", "구", "읍", "면", "동")
+
+
+def _patterns(alias):
+    # Names match whole words ("Tak" must not hit "Takua Pa", "양주" must not
+    # hit "남양주"); a Hangul name may end in an administrative unit so "강화"
+    # finds "강화군" and "강화읍"
+    key = normalize(alias)
+    if key.isascii():
+        return [f" {key} "]
+    return [f" {key} ", *(f" {key}{suffix} " for suffix in HANGUL_SUFFIXES)]
+
+
+# --- Matching Structures ---
+class _Automaton:
+    """Aho-Corasick over alias patterns; reports the longest alias found."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+
+    def add(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        if self._out[node] is None or len(pattern) > self._out[node][0]:
+            self._out[node] = (len(pattern), value)
+
+    def build(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Fold the longest suffix match into each node so scanning never walks fail chains for output
+                inherited = self._out[self._fail[nxt]]
+                if inherited is not None and (self._out[nxt] is None or inherited[0] > self._out[nxt][0]):
+                    self._out[nxt] = inherited
+                queue.append(nxt)
+        return self
+
+    def longest(self, text):
+        node, best = 0, None
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            out = self._out[node]
+            if out is not None and (best is None or out[0] > best[0]):
+                best = out
+        return best[1] if best else None
+
+
+class _Trie:
+    """Prefix trie; each node keeps its first COMPLETIONS values in dataset order."""
+
+    def __init__(self):
+        self._root = {"": []}
+
+    def add(self, key, value):
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {"": []})
+            if value not in node[""] and len(node[""]) < COMPLETIONS:
+                node[""].append(value)
+
+    def complete(self, prefix):
+        node = self._root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node[""]
+
+
+# --- Index ---
+class MalariaIndex:
+    def __init__(self, dataset):
+        self.source = dataset.get("source", "")
+        self._labels = {}
+        self._regions = {}
+        self._countries = {}
+        self._country_matcher = _Automaton()
+        self._country_trie = _Trie()
+        self._region_matchers = {}
+        self._region_tries = {}
+        for entry in dataset["countries"]:
+            name = entry["name"]
+            self._labels[name] = entry.get("ko") or name
+            for alias in (name, entry.get("ko"), *entry.get("aliases", ())):
+                if alias:
+                    self._countries.setdefault(normalize(alias), name)
+                    for pattern in _patterns(alias):
+                        self._country_matcher.add(pattern, name)
+                    self._country_trie.add(normalize(alias), name)
+            regions = entry.get("regions")
+            # No region list means the whole country is a risk area
+            self._regions[name] = {r["name"]: r.get("ko") or r["name"] for r in regions} if regions else None
+            if regions:
+                matcher, trie = _Automaton(), _Trie()
+                for region in regions:
+                    for alias in (region["name"], region.get("ko"), *region.get("aliases", ())):
+                        if alias:
+                            for pattern in _patterns(alias):
+                                matcher.add(pattern, region["name"])
+                            trie.add(normalize(alias), region["name"])
+                self._region_matchers[name] = matcher.build()
+                self._region_tries[name] = trie
+        self._country_matcher.build()
+
+    def country(self, text):
+        """Canonical country name for free text ("인도", "india", "Republic of India"), or None."""
+        key = normalize(text)
+        if not key:
+            return None
+        return self._countries.get(key) or self._country_matcher.longest(f" {key} ")
+
+    def match(self, country, region=""):
+        """(country, region) of the risk area the answers fall in, or None.
+
+        Whole-country areas match regardless of region; region-level areas
+        need the free-text region to mention one of the listed places.
+        """
+        name = self.country(country)
+        if name is None:
+            return None
+        if self._regions[name] is None:
+            return name, None
+        found = self._region_matchers[name].longest(f" {normalize(region)} ")
+        return (name, found) if found else None
+
+    def complete(self, prefix, country=None):
+        """Countries (or regions of `country`) whose name or alias starts with `prefix`."""
+        if country is None:
+            return list(self._country_trie.complete(normalize(prefix)))
+        trie = self._region_tries.get(self.country(country))
+        return list(trie.complete(normalize(prefix))) if trie else []
+
+    def countries(self):
+        return list(self._labels)
+
+    def regions(self, country):
+        return list(self._regions.get(self.country(country)) or ())
+
+    def label(self, name, is_kr, country=None):
+        """Display label: "인도 / India" in Korean, "India" in English."""
+        if country is None:
+            ko = self._labels.get(name)
+        else:
+            ko = (self._regions.get(self.country(country)) or {}).get(name)
+        if ko is None or not is_kr or ko == name:
+            return name
+        return f"{ko} / {name}"
+
+
+def load_areas(path=MALARIA_AREAS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def get_index(path=MALARIA_AREAS_PATH):
+    """Compiled once per process and path."""
+    return MalariaIndex(load_areas(path))
+
+
+# (country, region) -> expected match; run "python malaria_index.py" after editing the dataset
+SELF_CHECK = [
+    (("Korea", "강화군"), ("Korea", "Ganghwa")),
+    (("한국", "인천 강화읍 길상면"), ("Korea", "Ganghwa")),
+    (("대한민국", "경기도 파주시"), ("Korea", "Paju")),
+    (("Korea", "양주"), ("Korea", "Yangju")),
+    (("Korea", "남양주시"), None),
+    (("한국", "경기 남양주"), None),
+    (("Thailand", "Takua Pa"), None),
+    (("India", "Orissa"), ("India", "Odisha")),
+    (("인도", ""), None),
+]
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = get_index()
+    failed = [(args, want, index.match(*args)) for args, want in SELF_CHECK if index.match(*args) != want]
+    for args, want, got in failed:
+        print(f"FAIL match{args}: expected {want}, got {got}")
+    print(f"{len(SELF_CHECK) - len(failed)}/{len(SELF_CHECK)} checks passed")
+    sys.exit(1 if failed else 0)
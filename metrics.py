@@ -0,0 +1,183 @@
+# BloodReady | Timing Spans and Metrics
+# Named spans around the hot paths feed per-span counters and latency
+# histograms, and count() tallies outcomes (results, records written, emails
+# sent); all exposed in Prometheus text format over HTTP and/or a file.
+# Disabled (the default) every span is a shared no-op object.
+#
+#   BLOODREADY_METRICS=1              record spans
+#   BLOODREADY_METRICS_PORT=9464      serve /metrics on this port
+#   BLOODREADY_METRICS_FILE=path.prom rewrite this file (node_exporter textfile collector)
+
+import atexit
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("BLOODREADY_METRICS", "") not in ("", "0", "false", "no")
+METRICS_PORT = os.environ.get("BLOODREADY_METRICS_PORT")
+METRICS_FILE = os.environ.get("BLOODREADY_METRICS_FILE")
+FILE_INTERVAL = 15.0
+
+PREFIX = "bloodready"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --- Registry ---
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # span -> [bucket counts..., +Inf count, sum, errors]
+        self._spans = {}
+        self._counters = {}
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            row = self._spans.get(name)
+            if row is None:
+                row = self._spans[name] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    row[i] += 1
+                    break
+            else:
+                row[len(self.buckets)] += 1
+            row[-2] += seconds
+            if error:
+                row[-1] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            spans = {k: list(v) for k, v in self._spans.items()}
+            counters = dict(self._counters)
+        lines = [
+            f"# HELP {PREFIX}_span_seconds Time spent in each instrumented section.",
+            f"# TYPE {PREFIX}_span_seconds histogram",
+        ]
+        for name, row in sorted(spans.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), row[:len(self.buckets) + 1]):
+                cumulative += n
+                lines.append(f'{PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_span_seconds_sum{{span="{name}"}} {row[-2]:.6f}')
+            lines.append(f'{PREFIX}_span_seconds_count{{span="{name}"}} {cumulative}')
+        lines += [
+            f"# HELP {PREFIX}_span_errors_total Instrumented sections that raised.",
+            f"# TYPE {PREFIX}_span_errors_total counter",
+        ]
+        lines += [f'{PREFIX}_span_errors_total{{span="{name}"}} {row[-1]}' for name, row in sorted(spans.items())]
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# --- Spans ---
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe(self.name, time.perf_counter() - self.started, exc_type is not None)
+
+    def stop(self):
+        self.__exit__(None, None, None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def stop(self):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name):
+    """Times `with span(name): ...`, or from creation until `.stop()` for long sections."""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def count(name, n=1):
+    """Add `n` to the counter exported as bloodready_<name>_total."""
+    if ENABLED:
+        REGISTRY.count(name, n)
+
+
+# --- Exporters ---
+def _serve(port):
+    # http.server pulls in email/html parsing; only paid for when an endpoint is configured
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", int(port)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(path):
+    # Write-then-rename so a scraper never reads a half-written file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
+
+
+_exporters_lock = threading.Lock()
+_exporters_started = False
+
+
+def start_exporters(port=METRICS_PORT, path=METRICS_FILE, interval=FILE_INTERVAL):
+    """Start the configured HTTP endpoint / file writer once per process."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not ENABLED:
+            return
+        _exporters_started = True
+    if port:
+        _serve(port)
+    if path:
+        atexit.register(write_textfile, path)
+
+        def loop():
+            while True:
+                write_textfile(path)
+                time.sleep(interval)
+        threading.Thread(target=loop, name="metrics-file", daemon=True).start()
@@ -0,0 +1,170 @@
+# BloodReady | Submission Record Store
+# Append-only CSV writer shared by every Streamlit session. A single writer
+# thread drains queued records and commits them in groups under a file lock.
+
+import atexit
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from metrics import count, span
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: the writer thread still serializes in-process
+    fcntl = None
+
+RECORDS_PATH = "eligibility_records.csv"
+# Records no commit would take (a bad row, a permission change) land here as JSON lines
+REJECTED_PATH = os.environ.get("BLOODREADY_REJECTED_PATH", "rejected_records.jsonl")
+RECORD_FIELDS = [
+    "age", "weight", "gender", "hb", "well", "meds", "travel", "country",
+    "region", "donation_date", "tattoo", "eligible", "timestamp",
+]
+
+log = logging.getLogger(__name__)
+_STOP = object()
+
+
+def same_file(f, path):
+    """Whether the open file `f` is still the one at `path` (not renamed away)."""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+class RecordStore:
+    # Commit failures that are retried rather than ending the writer thread
+    retry_errors = (OSError,)
+
+    def __init__(self, path=RECORDS_PATH, fields=RECORD_FIELDS, flush_interval=0.5, max_batch=1000):
+        self.path = path
+        self.fields = list(fields)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="record-store-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, record):
+        if self._closed:
+            raise RuntimeError("record store is closed")
+        self._queue.put(record)
+
+    def flush(self):
+        """Block until every record appended so far is on disk."""
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    # --- Writer Thread ---
+    def _run(self):
+        pending = []
+        stopping = False
+        while not stopping or pending:
+            if not stopping:
+                stopping = self._collect(pending)
+            if not pending:
+                continue
+            try:
+                with span("records_commit"):
+                    self._commit(pending)
+                count("records_written", len(pending))
+            except self.retry_errors:
+                log.exception("Failed to write %d records to %s; retrying", len(pending), self.path)
+                if not stopping:
+                    time.sleep(self.flush_interval)
+                    continue
+                self._park(pending)
+            except Exception:
+                # Anything else would fail again on retry: commit the rows one by one
+                # so a single bad record does not take the batch (or the thread) down
+                log.exception("Failed to write %d records to %s; writing them one at a time", len(pending), self.path)
+                self._salvage(pending)
+            for _ in pending:
+                self._queue.task_done()
+            pending.clear()
+        self._queue.task_done()  # the stop sentinel
+
+    def _salvage(self, records):
+        rejected = []
+        for record in records:
+            try:
+                self._commit([record])
+                count("records_written")
+            except Exception:
+                log.exception("Rejected a record for %s", self.path)
+                rejected.append(record)
+        if rejected:
+            self._park(rejected)
+
+    def _park(self, records):
+        try:
+            with open(REJECTED_PATH, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+            log.error("Parked %d records for %s in %s", len(records), self.path, REJECTED_PATH)
+            count("records_rejected", len(records))
+        except Exception:
+            log.exception("Dropped %d records for %s", len(records), self.path)
+            count("records_dropped", len(records))
+
+    def _collect(self, pending):
+        # Wait for the first record, then keep gathering until the flush
+        # interval passes or the batch is full (group commit). A batch kept
+        # for retry is already due, so nothing blocks it on new records.
+        deadline = time.monotonic() if pending else None
+        while len(pending) < self.max_batch:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            pending.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return False
+
+    def _commit(self, records):
+        while not self._append(records):
+            pass
+
+    def _append(self, records):
+        """Write `records` under the file lock; False if the file was rotated first."""
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # The archiver may have renamed the file while we waited for the lock
+                if not same_file(f, self.path):
+                    return False
+                writer = csv.DictWriter(f, fieldnames=self.fields, extrasaction="ignore")
+                # Checked under the lock so concurrent writers never emit two headers
+                if f.seek(0, os.SEEK_END) == 0:
+                    writer.writeheader()
+                writer.writerows(records)
+                f.flush()
+                os.fsync(f.fileno())
+                return True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,155 @@
+# BloodReady | Records Index
+# In-memory index over the records CSV for the dashboard table: per-row byte
+# offsets, posting lists for the filter columns and numeric sort keys. Queries
+# touch only the matching posting lists and read just the visible page.
+
+import csv
+import os
+from array import array
+from datetime import date
+
+import numpy as np
+
+from dashboard_stats import CsvTail
+
+FILTER_COLUMNS = ("eligible", "gender", "country")
+SORT_COLUMNS = ("timestamp", "age", "weight", "hb")
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _key(column, value):
+    value = value.strip()
+    return value.casefold() if column == "country" else value
+
+
+def _day(timestamp):
+    try:
+        return date.fromisoformat(timestamp[:10]).toordinal() - _EPOCH
+    except ValueError:
+        return -1
+
+
+class RecordsIndex(CsvTail):
+    def _reset(self):
+        super()._reset()
+        self._offsets = array("q")
+        self._days = array("q")
+        self._days_sorted = True
+        self._numeric = {name: array("d") for name in SORT_COLUMNS if name != "timestamp"}
+        self._postings = {name: {} for name in FILTER_COLUMNS}
+        self._labels = {name: {} for name in FILTER_COLUMNS}
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def first_day(self):
+        """Date of the oldest indexed row, or None."""
+        with self._lock:
+            days = np.frombuffer(self._days, dtype=np.int64)
+            days = days[days >= 0]
+            return date.fromordinal(int(days.min()) + _EPOCH) if len(days) else None
+
+    def _ingest(self, rows, offsets):
+        cols = self.columns
+        ts_col = cols.get("timestamp")
+        for row, offset in zip(rows, offsets):
+            if not row:
+                continue
+            row_id = len(self._offsets)
+            self._offsets.append(offset)
+            day = _day(row[ts_col]) if ts_col is not None and ts_col < len(row) else -1
+            if self._days and day < self._days[-1]:
+                self._days_sorted = False
+            self._days.append(day)
+            for name, values in self._numeric.items():
+                i = cols.get(name)
+                try:
+                    values.append(float(row[i]))
+                except (TypeError, IndexError, ValueError):
+                    values.append(np.nan)
+            for name in FILTER_COLUMNS:
+                i = cols.get(name)
+                raw = row[i] if i is not None and i < len(row) else ""
+                key = _key(name, raw)
+                self._postings[name].setdefault(key, array("q")).append(row_id)
+                self._labels[name].setdefault(key, raw.strip())
+
+    def distinct(self, column):
+        """{key: label} for a filter column, most frequent first."""
+        with self._lock:
+            postings = self._postings[column]
+            keys = sorted(postings, key=lambda k: -len(postings[k]))
+            return {k: self._labels[column][k] for k in keys}
+
+    def query(self, start=None, end=None, equals=None, sort_by="timestamp", descending=True, offset=0, limit=50):
+        """Return (matching row count, DataFrame of one page)."""
+        with self._lock:
+            while True:
+                ids = self._match(start, end, equals or {})
+                ids = self._sort(ids, sort_by, descending)
+                page = ids[offset:offset + limit]
+                rows = self._read(self._offsets_for(page))
+                if rows is not None:
+                    return len(ids), rows
+                # The archiver rotated the file after the last refresh: re-index the new one
+                if self._refresh():
+                    self.version += 1
+
+    def _match(self, start, end, equals):
+        days = np.frombuffer(self._days, dtype=np.int64)
+        lo_day = -np.inf if start is None else start.toordinal() - _EPOCH
+        hi_day = np.inf if end is None else end.toordinal() - _EPOCH
+        if self._days_sorted:
+            # Rows are appended in time order: the date range is one contiguous id range
+            lo = int(np.searchsorted(days, lo_day, side="left"))
+            hi = int(np.searchsorted(days, hi_day, side="right"))
+            ids, in_range = None, (lo, hi)
+        else:
+            ids, in_range = np.flatnonzero((days >= lo_day) & (days <= hi_day)), None
+        for column, value in equals.items():
+            posting = self._postings[column].get(_key(column, value))
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            posting = np.frombuffer(posting, dtype=np.int64)
+            if in_range is not None:
+                lo, hi = in_range
+                posting = posting[np.searchsorted(posting, lo):np.searchsorted(posting, hi)]
+            ids = posting if ids is None else np.intersect1d(ids, posting, assume_unique=True)
+        if ids is None:
+            lo, hi = in_range
+            ids = np.arange(lo, hi, dtype=np.int64)
+        return ids
+
+    def _sort(self, ids, sort_by, descending):
+        if sort_by == "timestamp":
+            # Row order is arrival order
+            return ids[::-1] if descending else ids
+        values = np.frombuffer(self._numeric[sort_by], dtype=np.float64)[ids]
+        order = np.argsort(-values if descending else values, kind="stable")
+        return ids[order]
+
+    def _offsets_for(self, ids):
+        return np.frombuffer(self._offsets, dtype=np.int64)[ids].tolist()
+
+    def _read(self, offsets):
+        """One DataFrame row per offset; None if the indexed file is gone."""
+        import pandas as pd
+
+        header = sorted(self.columns, key=self.columns.get) if self.columns else []
+        if not offsets:
+            return pd.DataFrame([], columns=header)
+        rows = []
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            stat = os.fstat(f.fileno())
+            # Offsets only hold for the file they were indexed from
+            if (stat.st_dev, stat.st_ino) != self._file_id:
+                return None
+            for offset in offsets:
+                f.seek(offset)
+                row = next(csv.reader([f.readline().decode("utf-8")]))
+                rows.append((row + [""] * len(header))[:len(header)])
+        return pd.DataFrame(rows, columns=header)
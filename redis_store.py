@@ -0,0 +1,176 @@
+# BloodReady | Redis Record Store (optional, needs redis)
+# Records and dashboard figures shared by every replica through one Redis
+# (or Redis-compatible) server. Each group commit is a single MULTI: the
+# stream entries and the counters they move land together, so every replica
+# reads the same totals. The records table mirrors the stream into a local
+# SQLite file and queries it exactly like the sqlite backend.
+#
+#   BLOODREADY_STORE=redis BLOODREADY_REDIS_URL=redis://host:6379/0
+
+import atexit
+import os
+import tempfile
+import threading
+from collections import Counter
+
+import numpy as np
+import redis
+
+from dashboard_stats import AGE_BIN_EDGES, DashboardStats
+from record_store import RECORD_FIELDS, RecordStore
+from rollups import RollupWriter, Rollups, fold_events
+from sqlite_store import INSERT, ConnectionPool, SQLiteRecordsIndex, connect, to_row
+
+REDIS_URL = os.environ.get("BLOODREADY_REDIS_URL", "redis://localhost:6379/0")
+PREFIX = "bloodready:"
+STREAM = PREFIX + "records"
+STATS = PREFIX + "stats"
+MIRROR_BATCH = 10_000
+
+# Transient server or network trouble: the writer keeps the batch and retries
+RETRY_ERRORS = (OSError, redis.ConnectionError, redis.TimeoutError)
+
+
+def client(url=REDIS_URL):
+    return redis.Redis.from_url(url)
+
+
+def _age_bins(records, edges=AGE_BIN_EDGES):
+    ages = []
+    for record in records:
+        try:
+            ages.append(float(record.get("age")))
+        except (TypeError, ValueError):
+            pass
+    counts, _ = np.histogram(ages, bins=edges)
+    return counts
+
+
+class RedisRecordStore(RecordStore):
+    """RecordStore whose group commit is one transaction of XADDs plus the
+    dashboard counters (total, per result, per age bin) they move.
+
+    A commit retried after a connection drop may be applied twice; the
+    store is at-least-once, like the CSV writer after a failed fsync.
+    """
+
+    retry_errors = RETRY_ERRORS
+
+    def __init__(self, url=REDIS_URL, flush_interval=0.5, max_batch=1000):
+        self.client = client(url)
+        super().__init__(path=url, flush_interval=flush_interval, max_batch=max_batch)
+
+    def _commit(self, records):
+        stats = Counter(total=len(records))
+        for record in records:
+            stats[f"result:{record.get('eligible') or ''}"] += 1
+        for i, n in enumerate(_age_bins(records)):
+            if n:
+                stats[f"age:{i}"] += int(n)
+        pipe = self.client.pipeline(transaction=True)
+        for record in records:
+            pipe.xadd(STREAM, {name: "" if record.get(name) is None else str(record.get(name)) for name in RECORD_FIELDS})
+        for field, n in stats.items():
+            pipe.hincrby(STATS, field, n)
+        pipe.execute()
+
+
+class RedisDashboardStats(DashboardStats):
+    """DashboardStats read from the shared counters: one HGETALL per refresh,
+    whatever the number of records or replicas."""
+
+    def __init__(self, url=REDIS_URL, **kwargs):
+        self.client = client(url)
+        super().__init__(url, **kwargs)
+
+    def _refresh(self):
+        stats = {k.decode(): int(v) for k, v in self.client.hgetall(STATS).items()}
+        total = stats.get("total", 0)
+        if total == self.total:
+            return False
+        self.total = total
+        self.results = Counter({k[len("result:"):]: v for k, v in stats.items() if k.startswith("result:")})
+        self.age_counts = np.array([stats.get(f"age:{i}", 0) for i in range(len(self.age_bin_edges) - 1)], dtype=np.int64)
+        return True
+
+
+class RedisRecordsIndex(SQLiteRecordsIndex):
+    """SQLiteRecordsIndex over a per-process mirror of the stream; each
+    refresh copies only the entries after the last stream id it saw."""
+
+    def __init__(self, url=REDIS_URL, path=None):
+        self.client = client(url)
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="bloodready-mirror-", suffix=".db")
+            os.close(fd)
+            atexit.register(_remove, path)
+        self._mirror = connect(path)
+        self._mirror_lock = threading.Lock()
+        self._stream_id = "0-0"
+        super().__init__(ConnectionPool(path))
+
+    def _pull(self):
+        with self._mirror_lock:
+            while True:
+                entries = self.client.xrange(STREAM, min=f"({self._stream_id}", count=MIRROR_BATCH)
+                if not entries:
+                    return
+                rows = [to_row({k.decode(): v.decode() for k, v in fields.items()}) for _, fields in entries]
+                with self._mirror:
+                    self._mirror.execute("BEGIN")
+                    self._mirror.executemany(INSERT, rows)
+                self._stream_id = entries[-1][0].decode()
+
+    def refresh(self):
+        self._pull()
+        return super().refresh()
+
+
+def _remove(path):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+# --- Rollups ---
+def _rollup_key(period, bucket):
+    return f"{PREFIX}rollup:{period}:{bucket}"
+
+
+class RedisRollupWriter(RollupWriter):
+    """Rollups as one hash per (period, bucket), fields "metric:key"; the
+    bucket labels of each period are kept in a sorted set for range reads."""
+
+    retry_errors = RETRY_ERRORS
+
+    def __init__(self, url=REDIS_URL, flush_interval=0.5, max_batch=1000):
+        self.client = client(url)
+        super().__init__(path=url, flush_interval=flush_interval, max_batch=max_batch)
+
+    def _commit(self, events):
+        pipe = self.client.pipeline(transaction=True)
+        for (period, bucket, metric, key), n in fold_events(events).items():
+            pipe.hincrby(_rollup_key(period, bucket), f"{metric}:{key}", n)
+            pipe.zadd(f"{PREFIX}rollup:{period}", {bucket: 0})
+        pipe.execute()
+
+
+class RedisRollups(Rollups):
+    def __init__(self, url=REDIS_URL):
+        self.path = url
+        self.client = client(url)
+
+    def _rows(self, period, first, last, metrics):
+        labels = [b.decode() for b in self.client.zrangebylex(f"{PREFIX}rollup:{period}", f"[{first}", f"[{last}")]
+        pipe = self.client.pipeline(transaction=False)
+        for label in labels:
+            pipe.hgetall(_rollup_key(period, label))
+        rows = []
+        for label, fields in zip(labels, pipe.execute()):
+            for field, value in fields.items():
+                metric, key = field.decode().split(":", 1)
+                if metric in metrics:
+                    rows.append((label, metric, key, int(value)))
+        return rows
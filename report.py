@@ -0,0 +1,213 @@
+# BloodReady | PDF Report Engine
+# One fixed page template filled per result. The Unicode (Hangul) font is
+# parsed once per process and its subset is reused across reports.
+
+import functools
+import io
+import os
+import zipfile
+from datetime import date
+
+import fpdf
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+from eligibility import REASONS
+
+FONT_FAMILY = "report"
+# fonts-nanum (packages.txt) installs NanumGothic here; BLOODREADY_FONT overrides
+FONT_CANDIDATES = (
+    os.environ.get("BLOODREADY_FONT", ""),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "NanumGothic.ttf"),
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+)
+
+LABELS = {
+    "en": {
+        "title": "BloodReady | Blood Donation Eligibility",
+        "subtitle": "Your Warmth Can Save a Life.",
+        "result": "Result",
+        "age": "Age",
+        "weight": "Weight",
+        "hb": "Hemoglobin (Hb)",
+        "reasons": "Reasons",
+        "no_reasons": "No deferral reasons",
+        "checked": "Checked on",
+    },
+    "ko": {
+        "title": "BloodReady | 헌혈 자격 셀프 체크",
+        "subtitle": "당신의 따뜻함이 생명이 됩니다.",
+        "result": "결과",
+        "age": "나이",
+        "weight": "체중",
+        "hb": "헤모글로빈 (Hb)",
+        "reasons": "사유",
+        "no_reasons": "부적합 사유 없음",
+        "checked": "확인 날짜",
+    },
+}
+RESULTS = {"en": ("Eligible", "Not Eligible"), "ko": ("적합함", "부적합함")}
+
+RED = (214, 40, 40)
+GREEN = (45, 106, 79)
+PALE_RED = (253, 236, 236)
+PALE_GREEN = (232, 245, 238)
+GREY = (107, 114, 128)
+
+# Don't write fpdf's .pkl metric cache next to (possibly read-only) system fonts
+fpdf.set_global("FPDF_CACHE_MODE", 1)
+
+
+# --- Font Caching ---
+@functools.lru_cache(maxsize=32)
+def _subset(ttffile, glyphs):
+    ttf = TTFontFile()
+    stream = ttf.makeSubset(ttffile, list(glyphs))
+    return stream, ttf.codeToGlyph, ttf.maxUni
+
+
+class _CachedTTFontFile(TTFontFile):
+    """fpdf re-reads and subsets the TTF on every output(); reuse it per glyph set."""
+
+    def makeSubset(self, file, subset):
+        stream, code_to_glyph, max_uni = _subset(file, tuple(sorted(set(subset))))
+        self.codeToGlyph = dict(code_to_glyph)
+        self.maxUni = max_uni
+        return stream
+
+
+fpdf.fpdf.TTFontFile = _CachedTTFontFile
+
+
+class _ReportPDF(FPDF):
+    _widths = {}
+
+    def _putTTfontwidths(self, font, maxUni):
+        # The /W array walks every code point up to maxUni (65k for Hangul
+        # fonts) but only depends on the subset, so replay it from cache.
+        # cell() appends a subset entry per character printed; dedupe first.
+        font['subset'] = sorted(set(font['subset']))
+        key = (font['ttffile'], tuple(font['subset']), maxUni)
+        ops = self._widths.get(key)
+        if ops is None:
+            start = len(self.buffer)
+            super()._putTTfontwidths(font, maxUni)
+            ops = self._widths[key] = self.buffer[start:]
+        else:
+            self.buffer += ops
+
+
+@functools.lru_cache(maxsize=None)
+def _font_metrics(path):
+    pdf = FPDF()
+    pdf.add_font(FONT_FAMILY, "", path, uni=True)
+    return pdf.fonts[FONT_FAMILY], pdf.font_files
+
+
+def find_font():
+    return next((p for p in FONT_CANDIDATES if p and os.path.exists(p)), None)
+
+
+def _vocabulary():
+    texts = [s for labels in LABELS.values() for s in labels.values()]
+    texts += [s for pair in RESULTS.values() for s in pair]
+    texts += [s for _, kr, en in REASONS for s in (kr, en)]
+    return set("".join(texts))
+
+
+# --- Engine ---
+class ReportEngine:
+    def __init__(self, font_path=None):
+        self.font_path = font_path or find_font()
+        self.unicode = self.font_path is not None
+        if self.unicode:
+            self._font_info, self._font_files = _font_metrics(self.font_path)
+            # Seed the subset with every glyph the template can print so each
+            # report hits the same cached subset instead of re-subsetting the TTF
+            glyphs = set(range(32, 127)) | {ord(c) for c in _vocabulary()}
+            self._subset_seed = list(range(0, 32)) + sorted(glyphs)
+
+    def _new_pdf(self):
+        pdf = _ReportPDF()
+        pdf.set_auto_page_break(False)
+        pdf.set_margins(15, 15)
+        if self.unicode:
+            pdf.fonts[FONT_FAMILY] = dict(self._font_info, i=len(pdf.fonts) + 1, subset=list(self._subset_seed))
+            pdf.font_files.update({k: dict(v) for k, v in self._font_files.items()})
+        return pdf
+
+    def _set_font(self, pdf, size):
+        if self.unicode:
+            pdf.set_font(FONT_FAMILY, "", size)
+        else:
+            pdf.set_font("Arial", "B" if size > 14 else "", size)
+
+    def _text(self, s):
+        # Core fonts are latin-1 only; Hangul degrades to '?' without a TTF
+        return s if self.unicode else s.encode("latin-1", "replace").decode("latin-1")
+
+    def _page(self, pdf, report):
+        lang = report.get("locale") or ("ko" if report.get("is_kr") else "en")
+        lang = lang if lang in LABELS else "en"
+        labels = LABELS[lang]
+        eligible = report["eligible"]
+        result = report.get("result") or RESULTS[lang][0 if eligible else 1]
+        pdf.add_page()
+
+        # Header band
+        pdf.set_fill_color(*RED)
+        pdf.rect(0, 0, 210, 32, "F")
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_xy(15, 8)
+        self._set_font(pdf, 18)
+        pdf.cell(0, 10, self._text(labels["title"]), ln=1)
+        self._set_font(pdf, 11)
+        pdf.cell(0, 7, self._text(labels["subtitle"]), ln=1)
+
+        # Result block
+        pdf.set_xy(15, 42)
+        pdf.set_fill_color(*(PALE_GREEN if eligible else PALE_RED))
+        pdf.set_text_color(*(GREEN if eligible else RED))
+        self._set_font(pdf, 16)
+        pdf.cell(0, 14, self._text(f"{labels['result']}: {result}"), border=0, ln=1, align="C", fill=True)
+
+        # Details
+        pdf.ln(6)
+        pdf.set_text_color(17, 24, 39)
+        pdf.set_draw_color(243, 197, 197)
+        self._set_font(pdf, 12)
+        for key, value in (("age", report["age"]), ("weight", f"{report['weight']} kg"), ("hb", f"{report['hb']} g/dL")):
+            pdf.cell(60, 9, self._text(labels[key]), border=1)
+            pdf.cell(0, 9, self._text(str(value)), border=1, ln=1)
+
+        # Reasons table
+        pdf.ln(6)
+        pdf.set_fill_color(243, 244, 246)
+        pdf.cell(0, 9, self._text(labels["reasons"]), border=1, ln=1, fill=True)
+        for reason in report.get("reasons") or [labels["no_reasons"]]:
+            pdf.cell(0, 9, self._text(reason), border=1, ln=1)
+
+        pdf.set_xy(15, 280)
+        pdf.set_text_color(*GREY)
+        self._set_font(pdf, 9)
+        checked = report.get("date") or date.today()
+        pdf.cell(0, 6, self._text(f"{labels['checked']}: {checked}"), align="R")
+
+    def render(self, report):
+        """Render one result dict (age, weight, hb, eligible, reasons, locale) to PDF bytes."""
+        return self.render_many([report])
+
+    def render_many(self, reports):
+        """Bulk mode: one page per report in a single PDF."""
+        pdf = self._new_pdf()
+        for report in reports:
+            self._page(pdf, report)
+        return pdf.output(dest='S').encode('latin1')
+
+    def render_zip(self, reports, name="blood_eligibility_{:04d}.pdf"):
+        """Bulk mode: one PDF per report, packed into a ZIP archive."""
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, report in enumerate(reports, 1):
+                zf.writestr(name.format(i), self.render(report))
+        return buf.getvalue()
@@ -0,0 +1,280 @@
+# BloodReady | Time-Series Rollups
+# Dashboard trends served from counters kept per day, ISO week and month.
+# Submissions are folded in on write by a group-commit writer; every value
+# is a count (fixed-bin Hb histograms included), so rollups from several app
+# instances or a backfilled history merge by addition. A chart reads one row
+# per bucket and key, however long the history.
+#
+#   python rollups.py backfill [eligibility_records.csv] [out.db]
+#   python rollups.py merge <other.db> [...]
+
+import os
+import sqlite3
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+from eligibility import _gender, get_rules
+from record_store import RecordStore
+
+ROLLUPS_PATH = os.environ.get("BLOODREADY_ROLLUPS_PATH", "rollups.db")
+PERIODS = ("day", "week", "month")
+
+# Matches the Hb slider (5.0-20.0 g/dL) in 0.5 g/dL bins
+HB_MIN, HB_MAX, HB_STEP = 5.0, 20.0, 0.5
+HB_BINS = int((HB_MAX - HB_MIN) / HB_STEP)
+TREND_METRICS = ("submissions", "eligible", "malaria_travel")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (period, bucket, metric, key)
+) WITHOUT ROWID;
+"""
+UPSERT = (
+    "INSERT INTO rollups (period, bucket, metric, key, value) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (period, bucket, metric, key) DO UPDATE SET value = value + excluded.value"
+)
+
+
+def connect(path=ROLLUPS_PATH):
+    db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+# --- Buckets ---
+def bucket(day, period):
+    """Sortable label of the day / ISO week (its Monday) / month holding `day`."""
+    if period == "day":
+        return day.isoformat()
+    if period == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def buckets(period, last, count):
+    """The `count` bucket labels ending with the one holding `last`, oldest first."""
+    if period == "month":
+        months = last.year * 12 + last.month - 1
+        return [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(months - count + 1, months + 1)]
+    step = 7 if period == "week" else 1
+    end = date.fromisoformat(bucket(last, period))
+    return [(end - timedelta(days=step * i)).isoformat() for i in range(count - 1, -1, -1)]
+
+
+def hb_label(i):
+    return f"{HB_MIN + i * HB_STEP:.1f}"
+
+
+# --- Folding ---
+def day_counts(eligible, masks, genders, hb, malaria, rules=None):
+    """{(metric, key): count} for one day's submissions, given as equal-length arrays."""
+    rules = rules or get_rules()
+    counts = {
+        ("submissions", ""): len(eligible),
+        ("eligible", ""): int(np.count_nonzero(eligible)),
+        ("malaria_travel", ""): int(np.count_nonzero(malaria)),
+    }
+    # Advisory bits (no deferral) are not reasons anyone was turned away
+    deferrals = masks & rules.blocking
+    for rule in rules.rules:
+        n = int(np.count_nonzero(deferrals & rule.bit))
+        if n:
+            counts[("reason", rule.id)] = n
+    hb = np.asarray(hb, dtype=float)
+    valid = ~np.isnan(hb)
+    bins = np.clip(((hb[valid] - HB_MIN) // HB_STEP).astype(int), 0, HB_BINS - 1)
+    for gender in np.unique(genders[valid]):
+        hist = np.bincount(bins[genders[valid] == gender], minlength=HB_BINS)
+        for i in np.flatnonzero(hist):
+            counts[("hb", f"{gender}:{hb_label(i)}")] = int(hist[i])
+    return counts
+
+
+def fold(day, counts, into=None):
+    """Add one day's counts to every period's bucket for that day."""
+    into = Counter() if into is None else into
+    for period in PERIODS:
+        label = bucket(day, period)
+        for (metric, key), n in counts.items():
+            into[(period, label, metric, key)] += n
+    return into
+
+
+def fold_events(events, rules=None):
+    """Counter of rollup rows for submission events (dicts with day, eligible,
+    mask, gender, hb, malaria_risk), grouped by day and counted per group."""
+    rules = rules or get_rules()
+    by_day = {}
+    for event in events:
+        by_day.setdefault(event["day"], []).append(event)
+    out = Counter()
+    for day, group in by_day.items():
+        counts = day_counts(
+            np.array([bool(e["eligible"]) for e in group]),
+            np.array([int(e["mask"]) for e in group], dtype=np.int64),
+            np.array([_gender(e["gender"]) for e in group], dtype=object),
+            np.array([np.nan if e.get("hb") is None else float(e["hb"]) for e in group]),
+            np.array([bool(e.get("malaria_risk")) for e in group]),
+            rules,
+        )
+        fold(day, counts, out)
+    return out
+
+
+def apply(db, counts):
+    with db:
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany(UPSERT, [(*row, n) for row, n in counts.items()])
+
+
+# --- Writer ---
+class RollupWriter(RecordStore):
+    """Folds queued submission events into the rollups, one upsert per
+    touched (period, bucket, metric, key) per group commit."""
+
+    retry_errors = (OSError, sqlite3.OperationalError)
+
+    def __init__(self, path=ROLLUPS_PATH, flush_interval=0.5, max_batch=1000):
+        self._db = None
+        super().__init__(path=path, flush_interval=flush_interval, max_batch=max_batch)
+
+    def _commit(self, events):
+        if self._db is None:
+            self._db = connect(self.path)
+        apply(self._db, fold_events(events))
+
+    def close(self):
+        super().close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# --- Reading ---
+class Rollups:
+    def __init__(self, path=ROLLUPS_PATH):
+        self.path = path
+        connect(path).close()
+
+    def _rows(self, period, first, last, metrics):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            return db.execute(
+                f"SELECT bucket, metric, key, value FROM rollups WHERE period = ? AND bucket BETWEEN ? AND ? "
+                f"AND metric IN ({', '.join('?' * len(metrics))})",
+                (period, first, last, *metrics),
+            ).fetchall()
+        finally:
+            db.close()
+
+    def trend(self, period, last, count):
+        """{"bucket": [...], metric: [...], "eligibility_rate": [...]} for the last `count` buckets."""
+        labels = buckets(period, last, count)
+        position = {label: i for i, label in enumerate(labels)}
+        out = {"bucket": labels, **{metric: [0] * count for metric in TREND_METRICS}}
+        for label, metric, _, value in self._rows(period, labels[0], labels[-1], TREND_METRICS):
+            out[metric][position[label]] = value
+        out["eligibility_rate"] = [
+            round(100 * e / n, 1) if n else None for e, n in zip(out["eligible"], out["submissions"])
+        ]
+        return out
+
+    def totals(self, period, metric, first, last):
+        """Counter of `metric` by key over the buckets first..last."""
+        totals = Counter()
+        for _, _, key, value in self._rows(period, first, last, (metric,)):
+            totals[key] += value
+        return totals
+
+    def hb_histogram(self, period, first, last):
+        """{"hb": [...], "gender": [...], "count": [...]} rows over the buckets first..last."""
+        out = {"hb": [], "gender": [], "count": []}
+        for key, n in sorted(self.totals(period, "hb", first, last).items()):
+            gender, hb = key.split(":")
+            out["hb"].append(float(hb))
+            out["gender"].append(gender)
+            out["count"].append(n)
+        return out
+
+
+# --- Backfill and Merge ---
+def backfill(csv_path, path=ROLLUPS_PATH, chunksize=100_000):
+    """Rebuild rollups from an eligibility_records.csv into an empty database.
+
+    The records carry no reason mask, so reasons are re-evaluated against the
+    current rules as of each record's day; answers the CSV lacks
+    (menstruation, pregnancy, event dates) cannot contribute.
+    """
+    import pandas as pd
+
+    from dashboard_stats import ELIGIBLE_LABELS
+    from malaria_index import get_index
+
+    db = connect(path)
+    try:
+        (existing,) = db.execute("SELECT COUNT(*) FROM rollups").fetchone()
+        if existing:
+            raise ValueError(f"{path} already holds rollups; backfill into a new file and merge it")
+        rules, index = get_rules(), get_index()
+        rows = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str, keep_default_na=False):
+            days = pd.to_datetime(chunk["timestamp"].str[:10], errors="coerce", format="%Y-%m-%d")
+            counts = Counter()
+            for day, group in chunk[days.notna()].groupby(days[days.notna()].dt.date):
+                data = {f: pd.to_numeric(group[f], errors="coerce").to_numpy(float) for f in ("age", "weight", "hb")}
+                for field in ("well", "meds", "tattoo", "gender"):
+                    data[field] = group[field].to_numpy(object)
+                data["donation_date"] = pd.to_datetime(group["donation_date"], errors="coerce").to_numpy("datetime64[D]")
+                places = list(zip(group["country"], group["region"]))
+                risky = {place: index.match(*place) is not None for place in set(places)}
+                malaria = np.array([risky[p] for p in places]) & (group["travel"].to_numpy(object) != "no")
+                data["malaria_risk"] = malaria
+                _, masks = rules.evaluate(data, today=day)
+                eligible = group["eligible"].isin(ELIGIBLE_LABELS).to_numpy()
+                genders = np.array([_gender(g) for g in group["gender"]], dtype=object)
+                fold(day, day_counts(eligible, masks.astype(np.int64), genders, data["hb"], malaria, rules), counts)
+            apply(db, counts)
+            rows += len(chunk)
+        return rows
+    finally:
+        db.close()
+
+
+def merge(other, path=ROLLUPS_PATH):
+    """Add every counter of another rollups database into this one."""
+    db = connect(path)
+    try:
+        db.execute("ATTACH DATABASE ? AS other", (other,))
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            # "WHERE true" keeps the parser from reading ON CONFLICT as a join constraint
+            cur = db.execute(
+                "INSERT INTO rollups SELECT period, bucket, metric, key, value FROM other.rollups WHERE true "
+                "ON CONFLICT (period, bucket, metric, key) DO UPDATE SET value = value + excluded.value"
+            )
+        return cur.rowcount
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        src = sys.argv[2] if len(sys.argv) > 2 else "eligibility_records.csv"
+        dst = sys.argv[3] if len(sys.argv) > 3 else ROLLUPS_PATH
+        print(f"Folded {backfill(src, dst)} records from {src} into {dst}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "merge":
+        for other in sys.argv[2:]:
+            print(f"Merged {merge(other)} rollup rows from {other}")
+    else:
+        sys.exit("usage: python rollups.py backfill [records.csv] [out.db] | merge <other.db> [...]")
@@ -0,0 +1,291 @@
+# BloodReady | SQLite Record Store
+# Eligibility records in a WAL-mode SQLite database: the writer thread
+# group-commits batched inserts while sessions read through a shared
+# connection pool, and dashboard figures are indexed COUNT / GROUP BY queries.
+
+import os
+import queue
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+from dashboard_stats import DashboardStats
+from record_store import RECORD_FIELDS, RecordStore
+
+# Point every replica on a host (or a shared volume) at the same file
+SQLITE_PATH = os.environ.get("BLOODREADY_SQLITE_PATH", "eligibility_records.db")
+
+NUMERIC_FIELDS = ("age", "weight", "hb")
+SORT_COLUMNS = ("timestamp", "age", "weight", "hb")
+FILTER_COLUMNS = {"eligible": "eligible", "gender": "gender", "country": "country_key"}
+
+TABLE = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    age INTEGER,
+    weight INTEGER,
+    gender TEXT,
+    hb REAL,
+    well TEXT,
+    meds TEXT,
+    travel TEXT,
+    country TEXT,
+    region TEXT,
+    donation_date TEXT,
+    tattoo TEXT,
+    eligible TEXT,
+    timestamp TEXT,
+    country_key TEXT
+);
+"""
+# Filter indexes end in timestamp so a filtered page is read in order off the index;
+# each one also covers the dashboard's GROUP BY on its column.
+INDEXES = {
+    "records_timestamp": "timestamp",
+    "records_eligible": "eligible, timestamp",
+    "records_gender": "gender, timestamp",
+    "records_country": "country_key, timestamp",
+    "records_age": "age",
+}
+SCHEMA = TABLE + "".join(f"CREATE INDEX IF NOT EXISTS {name} ON records ({cols});\n" for name, cols in INDEXES.items())
+INSERT = (
+    f"INSERT INTO records ({', '.join(RECORD_FIELDS)}, country_key) "
+    f"VALUES ({', '.join('?' * (len(RECORD_FIELDS) + 1))})"
+)
+
+
+def connect(path=SQLITE_PATH, readonly=False):
+    db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: a commit survives a crash of the app, not of the machine
+    db.execute("PRAGMA synchronous=NORMAL")
+    if readonly:
+        db.execute("PRAGMA query_only=ON")
+    else:
+        db.executescript(SCHEMA)
+    return db
+
+
+def to_row(record):
+    """Record dict (as appended, or a CSV row) to INSERT parameters."""
+    values = []
+    for name in RECORD_FIELDS:
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+            if name in NUMERIC_FIELDS and value == "":
+                value = None
+        values.append(value)
+    country = record.get("country") or ""
+    values.append(country.strip().casefold())
+    return values
+
+
+def _group_counts(db, column, after, upto):
+    """[(value, count)] of `column` over ids in (after, upto]."""
+    # The first load scans the column's covering index; later ones read only the new rowid range
+    if after:
+        where, params = "id > ? AND id <= ?", (after, upto)
+    else:
+        where, params = "id <= ?", (upto,)
+    return db.execute(f"SELECT {column}, COUNT(*) FROM records WHERE {where} GROUP BY {column}", params).fetchall()
+
+
+class ConnectionPool:
+    """Read connections shared by every session; a connection is used by one thread at a time."""
+
+    def __init__(self, path=SQLITE_PATH, size=4):
+        self.path = path
+        # Create the file and schema before any reader opens it
+        connect(path).close()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                db = connect(self.path, readonly=True)
+            try:
+                yield db
+            finally:
+                self._idle.put(db)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class SQLiteRecordStore(RecordStore):
+    """RecordStore whose group commits are one executemany() transaction."""
+
+    retry_errors = (OSError, sqlite3.OperationalError)
+
+    def __init__(self, path=SQLITE_PATH, flush_interval=0.5, max_batch=1000):
+        self._db = None
+        super().__init__(path=path, flush_interval=flush_interval, max_batch=max_batch)
+
+    def _commit(self, records):
+        # Opened on the writer thread; the INSERT is prepared once and reused
+        if self._db is None:
+            self._db = connect(self.path)
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(INSERT, [to_row(r) for r in records])
+
+    def close(self):
+        super().close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class SQLiteDashboardStats(DashboardStats):
+    """DashboardStats over the records table. Rows are never updated, so each
+    refresh aggregates only ids above the last one seen."""
+
+    def __init__(self, pool, **kwargs):
+        self.pool = pool
+        super().__init__(pool.path, **kwargs)
+
+    def _reset(self):
+        super()._reset()
+        self._last_id = 0
+
+    def _refresh(self):
+        with self.pool.connection() as db:
+            (last_id,) = db.execute("SELECT MAX(id) FROM records").fetchone()
+            last_id = last_id or 0
+            if last_id == self._last_id:
+                return False
+            if last_id < self._last_id:
+                # Table was emptied or replaced
+                self._reset()
+            results = _group_counts(db, "eligible", self._last_id, last_id)
+            ages = [(age, n) for age, n in _group_counts(db, "age", self._last_id, last_id) if age is not None]
+        for label, count in results:
+            self.total += count
+            self.results[label or ""] += count
+        if ages:
+            values, weights = zip(*ages)
+            counts, _ = np.histogram(np.asarray(values, dtype=float), bins=self.age_bin_edges, weights=weights)
+            self.age_counts += counts.astype(np.int64)
+        self._last_id = last_id
+        return True
+
+
+class SQLiteRecordsIndex:
+    """RecordsIndex counterpart: filters, sorting and paging run as indexed
+    queries; the filter choices are counted incrementally like the dashboard."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.path = pool.path
+        self._lock = threading.Lock()
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self._last_id = 0
+        self._counts = {column: Counter() for column in FILTER_COLUMNS}
+        self._labels = {column: {} for column in FILTER_COLUMNS}
+
+    def refresh(self):
+        with self._lock:
+            with self.pool.connection() as db:
+                (last_id,) = db.execute("SELECT MAX(id) FROM records").fetchone()
+                last_id = last_id or 0
+                if last_id == self._last_id:
+                    return False
+                if last_id < self._last_id:
+                    self._reset()
+                for column, key in FILTER_COLUMNS.items():
+                    labels = self._labels[column]
+                    for value, count in _group_counts(db, key, self._last_id, last_id):
+                        value = value or ""
+                        self._counts[column][value] += count
+                        if value not in labels:
+                            labels[value] = value if key == column else db.execute(
+                                f"SELECT {column} FROM records WHERE {key} = ? LIMIT 1", (value,),
+                            ).fetchone()[0] or ""
+            self._last_id = last_id
+            self.version += 1
+            return True
+
+    def distinct(self, column):
+        """{key: label} for a filter column, most frequent first."""
+        with self._lock:
+            return {k: self._labels[column][k] for k, _ in self._counts[column].most_common()}
+
+    def query(self, start=None, end=None, equals=None, sort_by="timestamp", descending=True, offset=0, limit=50):
+        import pandas as pd
+
+        where, params = [], []
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            # Timestamps are "YYYY-MM-DD HH:MM:SS", so the day prefix bounds the range
+            where.append("timestamp < ?")
+            params.append(f"{end.isoformat()}~")
+        for column, value in (equals or {}).items():
+            where.append(f"{FILTER_COLUMNS[column]} = ?")
+            params.append(value.strip().casefold() if column == "country" else value.strip())
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort by {sort_by!r}")
+        direction = "DESC" if descending else "ASC"
+        # Each filter index ends in timestamp, so the default order is read straight off it
+        order = f"{sort_by} {direction}, id {direction}"
+        with self.pool.connection() as db:
+            (total,) = db.execute(f"SELECT COUNT(*) FROM records {clause}", params).fetchone()
+            rows = db.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM records {clause} ORDER BY {order} LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return total, pd.DataFrame(rows, columns=RECORD_FIELDS)
+
+
+def migrate_csv(csv_path, path=SQLITE_PATH, chunksize=100_000):
+    """One-shot migration of an eligibility_records.csv into an empty database."""
+    import csv
+
+    db = connect(path)
+    try:
+        (existing,) = db.execute("SELECT COUNT(*) FROM records").fetchone()
+        if existing:
+            raise ValueError(f"{path} already holds {existing} records")
+        # Building the indexes once after the load is much cheaper than maintaining them per row
+        for name in INDEXES:
+            db.execute(f"DROP INDEX {name}")
+        rows = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            while True:
+                chunk = [to_row(r) for _, r in zip(range(chunksize), reader)]
+                if not chunk:
+                    break
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(INSERT, chunk)
+                rows += len(chunk)
+        db.executescript(SCHEMA)
+        db.execute("ANALYZE")
+        return rows
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "eligibility_records.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH
+    if not os.path.exists(src):
+        sys.exit(f"{src} not found")
+    print(f"Migrated {migrate_csv(src, dst)} rows from {src} to {dst}")
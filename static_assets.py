@@ -0,0 +1,184 @@
+# BloodReady | Static Assets
+# The stylesheet, logo and event photos are built from assets/ into static/
+# under content-hashed names and served by Streamlit's static route
+# (server.enableStaticServing in .streamlit/config.toml). A rerun then sends
+# a short <link> or <img> tag instead of the CSS or image bytes, and because
+# a changed file gets a new name, a proxy or CDN in front of app/static/ may
+# cache every file there for good ("public, max-age=31536000, immutable";
+# Streamlit's own route sends no Cache-Control). Photos are shrunk to their
+# display width once, at build time; until they have been fetched, their
+# hosted originals are linked instead.
+#
+#   python static_assets.py build    assets/ -> static/ + static/manifest.json
+#   python static_assets.py fetch    download the hosted photos into assets/images, then build
+
+import hashlib
+import html
+import io
+import json
+import os
+import re
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(ROOT, "assets")
+# Streamlit serves the "static" folder next to the main script
+STATIC_DIR = os.path.join(ROOT, "static")
+MANIFEST = "manifest.json"
+URL_PREFIX = "app/static/"
+
+RASTER = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+# Widest the layout ever shows a photo (gallery grid cell at 2x, sidebar at 2x)
+IMAGE_WIDTH = 960
+IMAGE_WIDTHS = {"images/sidebar.png": 640}
+WEBP_QUALITY = 82
+
+# Photos the early gallery hot-linked from the hosted app
+REMOTE_IMAGES = {
+    "images/sidebar.png": "https://blood-health-chatbot.streamlit.app/files/file-SnFRkJPAD4wgV45VizmH6z",
+    "images/event-1.png": "https://blood-health-chatbot.streamlit.app/files/file-FzUtSQno4mRzY3VTvPSah6",
+    "images/event-2.png": "https://blood-health-chatbot.streamlit.app/files/file-DwgfFk9VY7Azh1Aqcdahev",
+    "images/event-3.png": "https://blood-health-chatbot.streamlit.app/files/file-Y2SssVJR6RnF1bPMRv6BMZ",
+}
+
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.[^.]+$")
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# --- Building ---
+def _resize(data, width):
+    """(WebP bytes, width, height) of an image no wider than `width`."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=6)
+        return out.getvalue(), image.width, image.height
+
+
+def _sources(source):
+    for base, _, files in os.walk(source):
+        for name in sorted(files):
+            if not name.startswith("."):
+                path = os.path.join(base, name)
+                yield os.path.relpath(path, source).replace(os.sep, "/"), path
+
+
+def build(source=SOURCE_DIR, out=STATIC_DIR):
+    """Fingerprint every file under `source` into `out` and write the manifest.
+
+    Sources whose hash matches the previous manifest are not processed
+    again, and fingerprinted files no longer referenced are removed.
+    """
+    previous = load_manifest(out)
+    manifest = {}
+    for name, path in _sources(source):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = fingerprint(data)
+        entry = previous.get(name)
+        if entry and entry["source"] == digest and os.path.exists(os.path.join(out, entry["file"])):
+            manifest[name] = entry
+            continue
+        stem, ext = os.path.splitext(name)
+        entry = {"source": digest}
+        if ext.lower() in RASTER:
+            data, entry["width"], entry["height"] = _resize(data, IMAGE_WIDTHS.get(name, IMAGE_WIDTH))
+            ext = ".webp"
+        entry["file"] = f"{stem}.{fingerprint(data)}{ext}"
+        _write(os.path.join(out, entry["file"]), data)
+        manifest[name] = entry
+    _write(os.path.join(out, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    live = {entry["file"] for entry in manifest.values()}
+    for name, path in _sources(out):
+        if _FINGERPRINTED.search(name) and name not in live:
+            os.remove(path)
+    return StaticAssets(manifest, source)
+
+
+def fetch(source=SOURCE_DIR, images=REMOTE_IMAGES):
+    """Download the remote photos missing from `source`; returns the names fetched."""
+    from urllib.request import urlopen
+
+    fetched = []
+    for name, url in images.items():
+        path = os.path.join(source, name)
+        if os.path.exists(path):
+            continue
+        with urlopen(url, timeout=30) as response:
+            _write(path, response.read())
+        fetched.append(name)
+    return fetched
+
+
+def load_manifest(out=STATIC_DIR):
+    try:
+        with open(os.path.join(out, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# --- Tags ---
+class StaticAssets:
+    """URLs and tags for the built assets, by source name ("bloodready.css").
+
+    A remote photo not built yet resolves to its hosted original.
+    """
+
+    def __init__(self, manifest, source=SOURCE_DIR, remote=REMOTE_IMAGES):
+        self.manifest = manifest
+        self.source = source
+        self.remote = remote
+
+    def __contains__(self, name):
+        return name in self.manifest or name in self.remote
+
+    def url(self, name):
+        if name not in self.manifest:
+            return self.remote[name]
+        return URL_PREFIX + self.manifest[name]["file"]
+
+    def stylesheet(self, name, inline=False):
+        """A <link> to the stylesheet, or with `inline` (static serving off) the CSS itself."""
+        if inline:
+            with open(os.path.join(self.source, name), encoding="utf-8") as f:
+                return f"<style>\n{f.read()}</style>"
+        return f"<link rel='stylesheet' href='{self.url(name)}'>"
+
+    def img(self, name, alt=""):
+        entry = self.manifest.get(name)
+        size = f"width='{entry['width']}' height='{entry['height']}' " if entry else ""
+        return (
+            f"<img src='{self.url(name)}' {size}"
+            f"alt='{html.escape(alt, quote=True)}' loading='lazy' decoding='async'>"
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("build", "fetch"):
+        sys.exit("usage: python static_assets.py build | fetch")
+    if command == "fetch":
+        for name in fetch():
+            print(f"Fetched {name}")
+    assets = build()
+    for name, entry in sorted(assets.manifest.items()):
+        print(f"{name} -> {URL_PREFIX}{entry['file']}")
@@ -0,0 +1,136 @@
+import csv
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import archiver
+from dashboard_stats import DashboardStats
+
+TODAY = date(2026, 10, 18)
+FIELDS = ["age", "region", "eligible", "timestamp"]
+
+
+def write_records(path, days_ago, region="Paju"):
+    """One row per entry of `days_ago`, oldest first."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        rows = []
+        for i, days in enumerate(days_ago):
+            row = [str(20 + i), region, "eligible" if i % 3 else "not_eligible", f"{TODAY - timedelta(days=days)} 09:30:00"]
+            writer.writerow(row)
+            rows.append(row)
+    return rows
+
+
+def read_segment(path):
+    with archiver._open(path, "rt") as f:
+        return list(csv.reader(f))
+
+
+def summary(archive_dir):
+    (path,) = archiver._summaries(archive_dir)
+    return archiver._read_summary(path)
+
+
+@pytest.fixture(params=["gzip", "zstd"])
+def codec(request):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def test_rotate_and_compact_round_trip(tmp_path, codec):
+    path, archive_dir = str(tmp_path / "records.csv"), str(tmp_path / "archive")
+    rows = write_records(path, range(20, 0, -1))
+    hot = DashboardStats(path)
+    hot.refresh()
+
+    segment = archiver.rotate(path, archive_dir, max_bytes=1, max_days=0, today=TODAY)
+    assert not os.path.exists(path)
+    data = archiver.compact(segment, codec, redact={}, today=TODAY)
+
+    assert not os.path.exists(segment)
+    assert data.endswith(archiver.SUFFIXES[codec])
+    assert read_segment(data) == [FIELDS] + rows
+    info = summary(archive_dir)
+    assert info["rows"] == hot.total == len(rows)
+    assert info["results"] == dict(hot.results)
+    assert info["age_counts"] == hot.age_counts.tolist()
+    assert (info["first_day"], info["last_day"]) == (str(TODAY - timedelta(days=20)), str(TODAY - timedelta(days=1)))
+
+
+def test_archived_stats_keep_totals_across_rotation(tmp_path):
+    path, archive_dir = str(tmp_path / "records.csv"), str(tmp_path / "archive")
+    write_records(path, [3, 2, 1])
+    stats = archiver.ArchivedDashboardStats(path, archive_dir)
+    stats.refresh()
+    before = (stats.total, dict(stats.results), stats.age_counts.tolist())
+
+    archiver.Archiver(path, archive_dir, max_bytes=1, codec="gzip", retention_days=0, redact={}).run_once(TODAY)
+    stats.refresh()
+
+    assert (stats.total, dict(stats.results), stats.age_counts.tolist()) == before
+    assert stats.archived_rows == 3
+
+
+@pytest.mark.parametrize("max_days, retention_days, redact, expected", [
+    (0, 0, {}, 0),
+    (30, 0, {}, 30),
+    (0, 730, {"region": 90}, 90),
+    (60, 730, {"region": 90, "country": 45}, 45),
+])
+def test_rotate_days_takes_the_shortest_window(max_days, retention_days, redact, expected):
+    assert archiver.rotate_days(max_days, retention_days, redact) == expected
+
+
+def test_small_hot_file_rotates_once_rows_reach_the_redaction_window(tmp_path):
+    path, archive_dir = str(tmp_path / "records.csv"), str(tmp_path / "archive")
+    write_records(path, [20, 10])
+    policy = archiver.Archiver(path, archive_dir, max_bytes=1 << 20, max_days=0, codec="gzip", retention_days=0, redact={"region": 30})
+
+    policy.run_once(TODAY)
+    assert os.path.exists(path)
+
+    policy.run_once(TODAY + timedelta(days=10))
+    assert not os.path.exists(path)
+    assert summary(archive_dir)["rows"] == 2
+
+
+def test_redaction_reaches_rows_as_they_age(tmp_path):
+    path, archive_dir = str(tmp_path / "records.csv"), str(tmp_path / "archive")
+    write_records(path, [40, 30, 20, 10, 0])
+    segment = archiver.rotate(path, archive_dir, max_bytes=1, max_days=0, today=TODAY)
+    data = archiver.compact(segment, "gzip", redact={"region": 25}, today=TODAY)
+
+    def regions():
+        return [row[1] for row in read_segment(data)[1:]]
+
+    assert regions() == ["", "", "Paju", "Paju", "Paju"]
+    assert summary(archive_dir)["redacted_before"] == {"region": str(TODAY - timedelta(days=25))}
+    assert archiver.enforce(archive_dir, 0, {"region": 25}, TODAY) == 0
+
+    assert archiver.enforce(archive_dir, 0, {"region": 25}, TODAY + timedelta(days=10)) == 1
+    assert regions() == ["", "", "", "Paju", "Paju"]
+
+    assert archiver.enforce(archive_dir, 0, {"region": 25}, TODAY + timedelta(days=26)) == 1
+    assert regions() == [""] * 5
+    info = summary(archive_dir)
+    assert info["redacted"] == ["region"] and info["redacted_before"] == {}
+
+
+def test_retention_purges_rows_but_keeps_the_summary(tmp_path):
+    path, archive_dir = str(tmp_path / "records.csv"), str(tmp_path / "archive")
+    write_records(path, [5, 4])
+    data = archiver.compact(archiver.rotate(path, archive_dir, max_bytes=1, max_days=0, today=TODAY), "gzip", {}, TODAY)
+
+    assert archiver.enforce(archive_dir, 30, {}, TODAY + timedelta(days=25)) == 0
+    assert archiver.enforce(archive_dir, 30, {}, TODAY + timedelta(days=40)) == 1
+
+    assert not os.path.exists(data)
+    info = summary(archive_dir)
+    assert info["purged"] == str(TODAY + timedelta(days=40)) and info["rows"] == 2
+    with open(archiver._summaries(archive_dir)[0], encoding="utf-8") as f:
+        assert json.load(f) == info
@@ -0,0 +1,72 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import donor_index
+from donor_index import CODE_ATTEMPTS, Challenge, DonorIndex, donor_key, enabled, verifiable
+
+SALT = "test-salt"
+TODAY = date(2026, 10, 18)
+
+
+def test_history_is_off_without_a_salt():
+    assert not enabled("")
+    with pytest.raises(ValueError):
+        donor_key("donor@example.com", salt="")
+
+
+def test_donor_key_normalizes_contacts():
+    assert donor_key(" Donor@Example.com ", SALT) == donor_key("donor@example.com", SALT)
+    assert donor_key("+82 10-1234-5678", SALT) == donor_key("010-1234-5678", SALT)
+    assert donor_key("donor@example.com", SALT) != donor_key("donor@example.com", "other-salt")
+    assert donor_key("n/a", SALT) is None
+
+
+def test_only_email_can_be_verified():
+    assert verifiable("donor@example.com")
+    assert not verifiable("010-1234-5678")
+
+
+def test_challenge_accepts_the_mailed_code():
+    donor = donor_key("donor@example.com", SALT)
+    challenge, code = Challenge.issue(donor)
+    assert code not in challenge.digest
+    assert challenge.check(f" {code} ")
+
+
+def test_challenge_rejects_wrong_codes_and_locks_after_the_attempt_limit():
+    challenge, code = Challenge.issue(donor_key("donor@example.com", SALT))
+    wrong = f"{(int(code) + 1) % 10 ** 6:06d}"
+    for _ in range(CODE_ATTEMPTS):
+        assert not challenge.check(wrong)
+    assert challenge.spent
+    assert not challenge.check(code)
+
+
+def test_challenge_is_bound_to_its_donor():
+    challenge, code = Challenge.issue(donor_key("donor@example.com", SALT))
+    other, _ = Challenge.issue(donor_key("other@example.com", SALT))
+    assert not Challenge(other.donor, challenge.digest, challenge.expires).check(code)
+
+
+def test_challenge_expires(monkeypatch):
+    challenge, code = Challenge.issue(donor_key("donor@example.com", SALT), ttl=60)
+    now = time.time()
+    monkeypatch.setattr(donor_index.time, "time", lambda: now + 61)
+    assert challenge.spent
+    assert not challenge.check(code)
+
+
+def test_record_tracks_the_next_eligible_date(tmp_path):
+    index = DonorIndex(str(tmp_path / "donors.db"))
+    donor = donor_key("donor@example.com", SALT)
+    assert index.donor(donor) is None
+
+    index.record(donor, TODAY, TODAY - timedelta(days=10), False, 1 << 8, TODAY + timedelta(days=46), interval=56)
+    found = index.record(donor, TODAY + timedelta(days=1), None, True, 0, TODAY + timedelta(days=1), interval=56)
+
+    assert found["visits"] == 2
+    assert found["last_donation"] == TODAY - timedelta(days=10)
+    assert found["next_eligible"] == TODAY + timedelta(days=46)
+    assert [visit["eligible"] for visit in index.history(donor)] == [1, 0]
@@ -0,0 +1,78 @@
+# eligibility.check must screen exactly like the inline rules the form used
+# before the engine existed (the baseline app_clean_final.py).
+
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+from eligibility import check, reason_labels
+
+TODAY = date(2026, 10, 18)
+
+# Answer spellings the form has stored: i18n codes, then the old English and Korean labels
+STYLES = {
+    "codes": {"yes": "yes", "no": "no", "female": "female", "male": "male", "other": "other"},
+    "en": {"yes": "Yes", "no": "No", "female": "Female", "male": "Male", "other": "Other"},
+    "ko": {"yes": "예 / Yes", "no": "아니요 / No", "female": "여성 / Female", "male": "남성 / Male", "other": "기타 / Other"},
+}
+
+
+def inline_rules(age, weight, hb, well, meds, tattoo, gender, menstruating, pregnancy, malaria_risk, donation_date):
+    """The baseline form's checks, line for line."""
+    days_since = (TODAY - donation_date).days
+    eligible = True
+    reasons = []
+    if age < 16: eligible, reasons = False, reasons + ["Under 16"]
+    if weight < 50: eligible, reasons = False, reasons + ["Under 50 kg"]
+    if "아니요" in well or well == "No": eligible, reasons = False, reasons + ["Not feeling well"]
+    if hb < 12.5: eligible, reasons = False, reasons + ["Low hemoglobin"]
+    if "예" in meds or meds == "Yes": eligible, reasons = False, reasons + ["Currently on medication"]
+    if malaria_risk: eligible, reasons = False, reasons + ["Visited malaria-risk region"]
+    if ("여성" in gender or gender == "Female"):
+        if "예" in menstruating or menstruating == "Yes":
+            reasons.append("Currently menstruating")
+        if "예" in pregnancy or pregnancy == "Yes":
+            eligible, reasons = False, reasons + ["Pregnant or recently gave birth"]
+    if days_since < 56: eligible, reasons = False, reasons + ["Donated within 8 weeks"]
+    if "예" in tattoo or tattoo == "Yes": eligible, reasons = False, reasons + ["Recent tattoo/piercing"]
+    return eligible, reasons
+
+
+def _cases():
+    people = [("female", m, p) for m in ("yes", "no", "unsure") for p in ("yes", "no")]
+    people += [("male", None, None), ("other", None, None)]
+    return itertools.product(
+        (15, 16, 40), (49, 50), (12.4, 12.5), ("yes", "no"), ("yes", "no"), ("yes", "no"),
+        people, (False, True), (0, 55, 56, 400),
+    )
+
+
+@pytest.mark.parametrize("style", sorted(STYLES))
+def test_check_matches_inline_rules(style):
+    words = STYLES[style]
+    old_words = STYLES["en"]
+    for age, weight, hb, well, meds, tattoo, (gender, menstruating, pregnancy), malaria, days in _cases():
+        donation_date = TODAY - timedelta(days=days)
+        answers = {
+            "age": age, "weight": weight, "hb": hb, "well": words[well], "meds": words[meds],
+            "tattoo": words[tattoo], "gender": words[gender], "malaria_risk": malaria,
+            "donation_date": donation_date,
+        }
+        if menstruating is not None:
+            answers["menstruating"] = words.get(menstruating, "Prefer not to say")
+            answers["pregnancy"] = words[pregnancy]
+        eligible, mask = check(today=TODAY, **answers)
+        expected = inline_rules(
+            age, weight, hb, old_words[well], old_words[meds], old_words[tattoo], old_words[gender],
+            old_words.get(menstruating, ""), old_words.get(pregnancy, ""), malaria, donation_date,
+        )
+        assert (eligible, reason_labels(mask)) == expected, answers
+
+
+def test_no_donation_date_is_a_first_time_donor():
+    eligible, mask = check(
+        today=TODAY, age=30, weight=60, hb=13.0, well="yes", meds="no", tattoo="no",
+        gender="male", malaria_risk=False, donation_date=None,
+    )
+    assert eligible and mask == 0
@@ -0,0 +1,8 @@
+import pytest
+
+from malaria_index import SELF_CHECK, get_index
+
+
+@pytest.mark.parametrize("args, expected", SELF_CHECK)
+def test_match(args, expected):
+    assert get_index().match(*args) == expected